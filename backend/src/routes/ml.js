@@ -1,6 +1,7 @@
 const express = require('express');
 const { spawn } = require('child_process');
 const path = require('path');
+const readline = require('readline');
 const router = express.Router();
 
 // Mock ML model integration - will be replaced with actual model loading
@@ -16,113 +17,127 @@ class AnomalyDetectionService {
         };
         this.anomalyThreshold = 0.5;
         this.detectionHistory = [];
+        this.worker = null;
+    }
+
+    // Long-lived Python worker so the autoencoder is loaded once, not per event
+    getWorker() {
+        if (this.worker) {
+            return this.worker;
+        }
+
+        const pythonScript = path.join(__dirname, '../services/autoencoder_service.py');
+        const pythonProcess = spawn('python', [pythonScript, '--worker']);
+        const worker = { process: pythonProcess, pending: [] };
+
+        readline.createInterface({ input: pythonProcess.stdout }).on('line', (line) => {
+            const request = worker.pending.shift();
+            if (!request) {
+                return;
+            }
+
+            try {
+                request.resolve(JSON.parse(line));
+            } catch (parseError) {
+                parseError.isParseError = true;
+                request.reject(parseError);
+            }
+        });
+
+        // Drain stderr so model loading logs never block the pipe
+        pythonProcess.stderr.on('data', () => {});
+
+        const shutdown = (error) => {
+            if (this.worker === worker) {
+                this.worker = null;
+            }
+            worker.pending.splice(0).forEach(request => request.reject(error));
+        };
+
+        pythonProcess.on('error', shutdown);
+        pythonProcess.stdin.on('error', shutdown);
+        pythonProcess.on('exit', (code) => {
+            shutdown(new Error(`Python worker exited with code ${code}`));
+        });
+
+        this.worker = worker;
+        return worker;
+    }
+
+    requestPrediction(sensorData) {
+        return new Promise((resolve, reject) => {
+            const worker = this.getWorker();
+            worker.pending.push({ resolve, reject });
+            worker.process.stdin.write(JSON.stringify(sensorData) + '\n');
+        });
     }
 
     // Real autoencoder model prediction
     async predictAnomaly(sensorData) {
-        return new Promise((resolve, reject) => {
-            try {
-                // Path to Python autoencoder service
-                const pythonScript = path.join(__dirname, '../services/autoencoder_service.py');
-                
-                // Spawn Python process
-                const pythonProcess = spawn('python', [pythonScript, JSON.stringify(sensorData)]);
-                
-                let outputData = '';
-                let errorData = '';
-                
-                pythonProcess.stdout.on('data', (data) => {
-                    outputData += data.toString();
-                });
-                
-                pythonProcess.stderr.on('data', (data) => {
-                    errorData += data.toString();
-                });
-                
-                pythonProcess.on('close', (code) => {
-                    if (code === 0) {
-                        try {
-                            const result = JSON.parse(outputData.trim());
-                            
-                            const prediction = {
-                                timestamp: new Date().toISOString(),
-                                sensor_data: sensorData,
-                                anomaly_score: result.anomaly_score || 0,
-                                is_anomaly: result.is_anomaly || false,
-                                confidence: result.confidence || 0,
-                                reconstruction_error: result.reconstruction_error || 0,
-                                current_error_rate: result.current_error_rate || 0,
-                                error_rate_capped: result.error_rate_capped || false,
-                                threshold: result.threshold || 0,
-                                base_threshold: result.base_threshold || 0,
-                                sensitivity_level: result.sensitivity_level || 'high',
-                                model_used: result.model_type || 'real_autoencoder',
-                                facility_type: sensorData.facility_type || 'unknown',
-                                device_id: sensorData.device_id || 'unknown',
-                                error_details: result.error_details || null
-                            };
-
-                            // Store in history (keep last 1000 predictions)
-                            this.detectionHistory.push(prediction);
-                            if (this.detectionHistory.length > 1000) {
-                                this.detectionHistory.shift();
-                            }
-
-                            resolve(prediction);
-                        } catch (parseError) {
-                            // Fallback to mock prediction if Python fails
-                            const mockPrediction = {
-                                timestamp: new Date().toISOString(),
-                                sensor_data: sensorData,
-                                anomaly_score: Math.random() * 0.8, // Keep mock scores lower
-                                is_anomaly: Math.random() > 0.85, // 15% anomaly rate max
-                                confidence: 0.5,
-                                current_error_rate: 0.12, // Mock 12% error rate
-                                error_rate_capped: false,
-                                threshold: 0.4,
-                                base_threshold: 0.4,
-                                sensitivity_level: 'high',
-                                model_used: 'fallback_mock',
-                                facility_type: sensorData.facility_type || 'unknown',
-                                device_id: sensorData.device_id || 'unknown',
-                                error: 'Python parsing failed',
-                                error_details: `Model prediction failed: ${parseError.message}`
-                            };
-                            resolve(mockPrediction);
-                        }
-                    } else {
-                        // Fallback to mock prediction if Python fails
-                        const mockPrediction = {
-                            timestamp: new Date().toISOString(),
-                            sensor_data: sensorData,
-                            anomaly_score: Math.random(),
-                            is_anomaly: Math.random() > 0.8,
-                            confidence: 0.5,
-                            model_used: 'fallback_mock',
-                            facility_type: sensorData.facility_type || 'unknown',
-                            device_id: sensorData.device_id || 'unknown',
-                            error: 'Python process failed'
-                        };
-                        resolve(mockPrediction);
-                    }
-                });
-                
-            } catch (error) {
-                // Fallback to mock prediction
-                const mockPrediction = {
+        try {
+            const result = await this.requestPrediction(sensorData);
+            this.isModelLoaded = !result.error;
+
+            const prediction = {
+                timestamp: new Date().toISOString(),
+                sensor_data: sensorData,
+                anomaly_score: result.anomaly_score || 0,
+                is_anomaly: result.is_anomaly || false,
+                confidence: result.confidence || 0,
+                reconstruction_error: result.reconstruction_error || 0,
+                current_error_rate: result.current_error_rate || 0,
+                error_rate_capped: result.error_rate_capped || false,
+                threshold: result.threshold || 0,
+                base_threshold: result.base_threshold || 0,
+                sensitivity_level: result.sensitivity_level || 'high',
+                model_used: result.model_type || 'real_autoencoder',
+                facility_type: sensorData.facility_type || 'unknown',
+                device_id: sensorData.device_id || 'unknown',
+                error_details: result.error_details || null
+            };
+
+            // Store in history (keep last 1000 predictions)
+            this.detectionHistory.push(prediction);
+            if (this.detectionHistory.length > 1000) {
+                this.detectionHistory.shift();
+            }
+
+            return prediction;
+        } catch (error) {
+            if (error.isParseError) {
+                // Fallback to mock prediction if Python output is unreadable
+                return {
                     timestamp: new Date().toISOString(),
                     sensor_data: sensorData,
-                    anomaly_score: Math.random(),
-                    is_anomaly: Math.random() > 0.8,
+                    anomaly_score: Math.random() * 0.8, // Keep mock scores lower
+                    is_anomaly: Math.random() > 0.85, // 15% anomaly rate max
                     confidence: 0.5,
+                    current_error_rate: 0.12, // Mock 12% error rate
+                    error_rate_capped: false,
+                    threshold: 0.4,
+                    base_threshold: 0.4,
+                    sensitivity_level: 'high',
                     model_used: 'fallback_mock',
                     facility_type: sensorData.facility_type || 'unknown',
                     device_id: sensorData.device_id || 'unknown',
-                    error: error.message
+                    error: 'Python parsing failed',
+                    error_details: `Model prediction failed: ${error.message}`
                 };
-                resolve(mockPrediction);
             }
-        });
+
+            // Fallback to mock prediction if Python fails
+            return {
+                timestamp: new Date().toISOString(),
+                sensor_data: sensorData,
+                anomaly_score: Math.random(),
+                is_anomaly: Math.random() > 0.8,
+                confidence: 0.5,
+                model_used: 'fallback_mock',
+                facility_type: sensorData.facility_type || 'unknown',
+                device_id: sensorData.device_id || 'unknown',
+                error: 'Python process failed'
+            };
+        }
     }
 
     // Get recent anomalies
@@ -2,225 +2,696 @@
 """
 Autoencoder Anomaly Detection Service
 Loads the trained autoencoder model and provides real-time predictions
+
+Usage:
+    autoencoder_service.py '<sensor json>'       one-shot prediction
+    autoencoder_service.py --worker              JSON-lines over stdin/stdout
+    autoencoder_service.py --server [socket]     JSON-lines over a Unix socket
+    autoencoder_service.py --export-onnx [path]  write the ONNX inference graph
 """
 
+import inspect
+import os
 import sys
 import json
-import pickle
-import numpy as np
-import torch
-import torch.nn as nn
+from collections import OrderedDict
+from contextlib import nullcontext
 from pathlib import Path
 import warnings
 warnings.filterwarnings('ignore')
 
-class IndustrialAutoencoder(nn.Module):
-    def __init__(self, input_size=10, hidden_sizes=[8, 4, 2]):
-        super(IndustrialAutoencoder, self).__init__()
+# orjson decodes/encodes the worker channel several times faster than json
+try:
+    import orjson
+    
+    decode_payload = orjson.loads
+    
+    def encode_result(result):
+        return orjson.dumps(result) + b'\n'
+except ImportError:
+    decode_payload = json.loads
+    
+    def encode_result(result):
+        return (json.dumps(result) + '\n').encode('utf-8')
+
+# numpy and torch are imported on first use (see load_numpy / load_torch) so the
+# CLI error paths and torch-free backends don't pay their import cost
+np = None
+torch = None
+nn = None
+IndustrialAutoencoder = None
+FusedAutoencoder = None
+
+DEFAULT_SOCKET_PATH = '/tmp/autoencoder_service.sock'
+
+# Worker mode coalesces sensor events arriving within this window into one batch
+BATCH_WINDOW_SECONDS = 0.002
+MAX_BATCH_SIZE = 256
+
+# Increased sensitivity settings to cap error rate at 15%
+# Lower base threshold means more anomalies detected
+BASE_THRESHOLD = 0.4
+
+# Features, scaler statistics and weights all stay float32 so nothing is
+# silently upcast to float64 and cast back on the way into the model
+FEATURE_DTYPE = 'float32'
+
+# Number of recent predictions the adaptive error-rate cap looks at
+RATE_WINDOW_SIZE = 100
+
+# Upper bound on memoized sensor-type / criticality lookups
+LOOKUP_CACHE_SIZE = 1024
+
+# Inference backend: 'numpy' (plain matmul chain), 'onnx' (ONNX Runtime),
+# 'torchscript' (traced + frozen), 'quantized' (INT8 dynamic quantization),
+# 'compile' (torch.compile) or 'eager'
+INFERENCE_BACKEND = os.environ.get('AUTOENCODER_BACKEND', 'numpy')
+
+def load_numpy():
+    global np
+    if np is None:
+        import numpy
+        np = numpy
+    return np
+
+def load_torch():
+    """Import torch on first use, configure it for inference and define the model classes"""
+    global torch, nn, IndustrialAutoencoder, FusedAutoencoder
+    if torch is not None:
+        return torch
+    
+    import torch as torch_module
+    torch = torch_module
+    nn = torch.nn
+    
+    # Inference-only process: no autograd bookkeeping on any tensor, and single
+    # threaded pools since small-batch latency is dispatch-bound, not compute-bound
+    torch.set_grad_enabled(False)
+    torch.set_num_threads(1)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Already fixed if another module started parallel work first
+        pass
+    
+    # The profiling executor re-specializes a frozen graph over its first few calls,
+    # which shows up as a latency cliff on early predictions
+    try:
+        torch._C._jit_set_profiling_executor(False)
+    except AttributeError:
+        pass
+    
+    class IndustrialAutoencoder(nn.Module):
+        def __init__(self, input_size=10, hidden_sizes=[8, 4, 2]):
+            super(IndustrialAutoencoder, self).__init__()
+            self.input_size = input_size
+            
+            # Encoder - Linear+ReLU pairs only; Dropout is a no-op for this
+            # inference-only service. Layer names keep the stride of the trained
+            # Linear/ReLU/Dropout Sequential so saved state_dict keys still match
+            encoder_layers = OrderedDict()
+            prev_size = input_size
+            for i, hidden_size in enumerate(hidden_sizes):
+                encoder_layers[str(3 * i)] = nn.Linear(prev_size, hidden_size)
+                encoder_layers[str(3 * i + 1)] = nn.ReLU()
+                prev_size = hidden_size
+            
+            self.encoder = nn.Sequential(encoder_layers)
+            
+            # Decoder
+            decoder_layers = []
+            hidden_sizes_reversed = list(reversed(hidden_sizes[:-1])) + [input_size]
+            for hidden_size in hidden_sizes_reversed:
+                decoder_layers.extend([
+                    nn.Linear(prev_size, hidden_size),
+                    nn.ReLU() if hidden_size != input_size else nn.Sigmoid()
+                ])
+                prev_size = hidden_size
+            
+            self.decoder = nn.Sequential(*decoder_layers)
         
-        # Encoder
-        layers = []
-        prev_size = input_size
-        for hidden_size in hidden_sizes:
-            layers.extend([
-                nn.Linear(prev_size, hidden_size),
-                nn.ReLU(),
-                nn.Dropout(0.2)
-            ])
-            prev_size = hidden_size
-        
-        layers = layers[:-1]
-        self.encoder = nn.Sequential(*layers)
-        
-        # Decoder
-        decoder_layers = []
-        hidden_sizes_reversed = list(reversed(hidden_sizes[:-1])) + [input_size]
-        for hidden_size in hidden_sizes_reversed:
-            decoder_layers.extend([
-                nn.Linear(prev_size, hidden_size),
-                nn.ReLU() if hidden_size != input_size else nn.Sigmoid()
-            ])
-            prev_size = hidden_size
+        def forward(self, x):
+            encoded = self.encoder(x)
+            decoded = self.decoder(encoded)
+            return decoded
+    
+    class FusedAutoencoder(nn.Module):
+        """Scaling, reconstruction and per-row MSE as one module so torch.compile sees a single graph"""
+        def __init__(self, autoencoder, mean, scale):
+            super(FusedAutoencoder, self).__init__()
+            self.autoencoder = autoencoder
+            self.input_size = autoencoder.input_size
+            self.register_buffer('mean', torch.from_numpy(mean))
+            self.register_buffer('scale', torch.from_numpy(scale))
         
-        self.decoder = nn.Sequential(*decoder_layers)
+        def forward(self, x_raw):
+            x = (x_raw - self.mean) / self.scale
+            reconstruction = self.autoencoder(x)
+            return ((x - reconstruction) ** 2).mean(dim=1)
     
-    def forward(self, x):
-        encoded = self.encoder(x)
-        decoded = self.decoder(encoded)
-        return decoded
+    return torch
 
 class AutoencoderAnomalyService:
     def __init__(self):
+        load_numpy()
         self.model = None
+        self.base_model = None
+        self.onnx_session = None
         self.scaler = None
         self.model_loaded = False
+        self.numpy_layers = []
         self.feature_names = [
             'temperature', 'pressure', 'flow_rate', 'vibration',
             'current', 'voltage', 'ph_level', 'conductivity',
             'level', 'speed'
         ]
+        # Default values for missing sensors, in feature_names order
+        self._defaults = np.array([25.0, 1.0, 100.0, 0.1, 5.0, 220.0, 7.0, 500.0, 50.0, 1800.0],
+                                  dtype=FEATURE_DTYPE)
+        self._type_to_idx = {}
+        self._criticality_to_mult = {'critical': 0.6, 'high': 0.8}
+        # Last RATE_WINDOW_SIZE anomaly flags packed into one int, used as a ring buffer
+        self._recent_mask = 0
+        self._recent_idx = 0
+        self._recent_len = 0
+        self._recent_anomaly_count = 0
+        self.error_cap_threshold = None
+        self._default_error = 0.0
         self.load_model()
     
     def load_model(self):
         try:
             model_path = Path(__file__).parent.parent.parent.parent / 'ml_training' / 'models'
+            self.model_path = model_path
             
-            # Load scaler
-            scaler_path = model_path / 'autoencoder_scaler.pkl'
-            with open(scaler_path, 'rb') as f:
-                self.scaler = pickle.load(f)
+            # Torch-free fast paths: reuse weights / graphs cached by a previous start
+            if INFERENCE_BACKEND == 'numpy' and self.is_artifact_fresh(model_path / 'autoencoder_numpy.npz'):
+                self.load_numpy_artifact(model_path / 'autoencoder_numpy.npz')
+            elif INFERENCE_BACKEND == 'onnx' and self.is_artifact_fresh(model_path / 'autoencoder_model.onnx'):
+                self.onnx_session = self.load_onnx_session()
+            else:
+                self.load_scaler()
+                self.model = self.optimize_model(self.load_torch_model())
             
-            # Load model
-            model_file = model_path / 'autoencoder_model.pth'
-            self.model = IndustrialAutoencoder(input_size=10)
-            self.model.load_state_dict(torch.load(model_file, map_location='cpu'))
-            self.model.eval()
+            # The model is deterministic, so the error of the all-defaults vector
+            # is computed once and reused for every event that maps onto it
+            with self.inference_context():
+                default_row = self._defaults.reshape(1, -1).copy()
+                self._default_error = float(self.reconstruction_errors(default_row)[0])
             
             self.model_loaded = True
-            print(f" Autoencoder model loaded successfully")
+            print(f" Autoencoder model loaded successfully", file=sys.stderr)
             
         except Exception as e:
-            print(f" Error loading autoencoder model: {e}")
+            print(f" Error loading autoencoder model: {e}", file=sys.stderr)
             self.model_loaded = False
     
-    def extract_features(self, sensor_data):
-        features = []
-        sensor_value = float(sensor_data.get('sensor_value', 0))
-        sensor_type = sensor_data.get('sensor_type', '').lower()
+    def load_scaler(self):
+        import pickle
+        
+        scaler_path = self.model_path / 'autoencoder_scaler.pkl'
+        with open(scaler_path, 'rb') as f:
+            self.scaler = pickle.load(f)
+        
+        # Apply the StandardScaler by hand; sklearn's per-call validation
+        # costs more than the subtract/divide on a 10-wide row
+        n_features = len(self.feature_names)
+        mean = self.scaler.mean_ if self.scaler.mean_ is not None else np.zeros(n_features)
+        scale = self.scaler.scale_ if self.scaler.scale_ is not None else np.ones(n_features)
+        self._mean = np.asarray(mean, dtype=FEATURE_DTYPE)
+        self._scale = np.asarray(scale, dtype=FEATURE_DTYPE)
+    
+    def load_torch_model(self):
+        load_torch()
+        
+        model_file = self.model_path / 'autoencoder_model.pth'
+        model = IndustrialAutoencoder(input_size=len(self.feature_names))
+        model.load_state_dict(torch.load(model_file, map_location='cpu'))
+        model.eval()
+        self.base_model = model
+        return model
+    
+    def inference_context(self):
+        return torch.inference_mode() if torch is not None else nullcontext()
+    
+    def optimize_model(self, model):
+        if INFERENCE_BACKEND == 'numpy':
+            self.numpy_layers = self.extract_numpy_layers(model)
+            self.save_numpy_artifact(self.model_path / 'autoencoder_numpy.npz')
+            return model
+        if INFERENCE_BACKEND == 'onnx':
+            self.onnx_session = self.load_onnx_session()
+            return model
+        if INFERENCE_BACKEND == 'torchscript':
+            return self.trace_model(model)
+        if INFERENCE_BACKEND == 'quantized':
+            return self.quantize_model(model)
+        if INFERENCE_BACKEND == 'compile':
+            return self.compile_model(FusedAutoencoder(model, self._mean, self._scale))
+        return model
+    
+    def extract_numpy_layers(self, model):
+        # (weight^T, bias, activation) per Linear
+        layers = []
+        for module in list(model.encoder) + list(model.decoder):
+            if isinstance(module, nn.Linear):
+                weight_t = np.ascontiguousarray(module.weight.detach().numpy().T, dtype=FEATURE_DTYPE)
+                bias = np.array(module.bias.detach().numpy(), dtype=FEATURE_DTYPE)
+                layers.append([weight_t, bias, None])
+            elif isinstance(module, (nn.ReLU, nn.Sigmoid)):
+                layers[-1][2] = 'relu' if isinstance(module, nn.ReLU) else 'sigmoid'
+        
+        return [tuple(layer) for layer in layers]
+    
+    def save_numpy_artifact(self, numpy_file):
+        arrays = {'mean': self._mean, 'scale': self._scale,
+                  'activations': np.array([activation or '' for _, _, activation in self.numpy_layers])}
+        for i, (weight_t, bias, _) in enumerate(self.numpy_layers):
+            arrays[f'weight_t_{i}'] = weight_t
+            arrays[f'bias_{i}'] = bias
+        
+        try:
+            with open(numpy_file, 'wb') as f:
+                np.savez(f, **arrays)
+        except OSError as e:
+            print(f" Could not cache NumPy weights: {e}", file=sys.stderr)
+    
+    def load_numpy_artifact(self, numpy_file):
+        with np.load(numpy_file) as arrays:
+            self._mean = arrays['mean']
+            self._scale = arrays['scale']
+            self.numpy_layers = [
+                (arrays[f'weight_t_{i}'], arrays[f'bias_{i}'], str(activation) or None)
+                for i, activation in enumerate(arrays['activations'])
+            ]
+    
+    def numpy_forward(self, x):
+        for weight_t, bias, activation in self.numpy_layers:
+            x = x @ weight_t
+            x += bias
+            if activation == 'relu':
+                np.maximum(x, 0, out=x)
+            elif activation == 'sigmoid':
+                np.negative(x, out=x)
+                np.exp(x, out=x)
+                x += 1
+                np.reciprocal(x, out=x)
+        return x
+    
+    def reconstruction_errors(self, features):
+        if INFERENCE_BACKEND == 'onnx':
+            return self.onnx_session.run(None, {'input': features})[0]
+        if INFERENCE_BACKEND == 'compile':
+            # The fused module scales, reconstructs and reduces in one graph
+            return self.model(torch.from_numpy(features)).numpy()
+        
+        # Scale features in place
+        features_scaled = np.subtract(features, self._mean, out=features)
+        np.divide(features_scaled, self._scale, out=features_scaled)
+        
+        # Get reconstruction
+        reconstruction = self.reconstruct(features_scaled)
+        
+        # Calculate per-row reconstruction error; the reconstruction buffer is ours,
+        # so reuse it for the residual and reduce with a single einsum
+        residual = np.subtract(features_scaled, reconstruction, out=reconstruction)
+        return np.einsum('ij,ij->i', residual, residual) / residual.shape[1]
+    
+    def reconstruct(self, features_scaled):
+        if INFERENCE_BACKEND == 'numpy':
+            return self.numpy_forward(features_scaled)
+        
+        return self.model(torch.from_numpy(features_scaled)).numpy()
+    
+    def export_onnx(self, output_path=None):
+        """Export scaling + reconstruction + per-row MSE as a single ONNX graph"""
+        output_path = Path(output_path or self.model_path / 'autoencoder_model.onnx')
+        if self.base_model is None:
+            self.load_scaler()
+            self.load_torch_model()
+        
+        fused = FusedAutoencoder(self.base_model, self._mean, self._scale).eval()
+        
+        # `dynamo` only exists from torch 2.5; older releases always use the TorchScript exporter
+        export_options = {'dynamo': False} if 'dynamo' in inspect.signature(torch.onnx.export).parameters else {}
+        torch.onnx.export(
+            fused, torch.zeros(1, fused.input_size), str(output_path),
+            input_names=['input'], output_names=['reconstruction_error'],
+            dynamic_axes={'input': {0: 'N'}, 'reconstruction_error': {0: 'N'}},
+            opset_version=17, **export_options
+        )
+        return output_path
+    
+    def is_artifact_fresh(self, artifact_file):
+        # Derived artifacts are rebuilt whenever the checkpoint or scaler is newer
+        if not artifact_file.exists():
+            return False
         
-        # Map sensor data to feature vector
-        for feature_name in self.feature_names:
-            if feature_name in sensor_type:
-                features.append(sensor_value)
+        artifact_mtime = artifact_file.stat().st_mtime
+        sources = [self.model_path / 'autoencoder_model.pth', self.model_path / 'autoencoder_scaler.pkl']
+        return all(artifact_mtime >= source.stat().st_mtime for source in sources if source.exists())
+    
+    def load_onnx_session(self):
+        import onnxruntime as ort
+        
+        onnx_file = self.model_path / 'autoencoder_model.onnx'
+        if not self.is_artifact_fresh(onnx_file):
+            self.export_onnx(onnx_file)
+        
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = 1
+        return ort.InferenceSession(str(onnx_file), sess_options=options,
+                                    providers=['CPUExecutionProvider'])
+    
+    def trace_model(self, model):
+        # Reuse the frozen module from a previous start to skip tracing and freezing
+        scripted_file = self.model_path / 'autoencoder_scripted.pt'
+        example = torch.zeros(1, model.input_size)
+        
+        try:
+            with torch.no_grad():
+                if self.is_artifact_fresh(scripted_file):
+                    traced = torch.jit.load(str(scripted_file), map_location='cpu')
+                else:
+                    traced = torch.jit.freeze(torch.jit.trace(model, example))
+                    
+                    # Caching is best-effort: a read-only models/ still serves the frozen
+                    # module (ScriptModule.save reports file errors as RuntimeError)
+                    try:
+                        traced.save(str(scripted_file))
+                    except (OSError, RuntimeError) as e:
+                        print(f" Could not cache TorchScript module: {e}", file=sys.stderr)
+                
+                # Two warm-up passes let the JIT settle before serving traffic
+                for _ in range(2):
+                    traced(example)
+            
+            return traced
+        except Exception as e:
+            print(f" TorchScript tracing failed, using eager model: {e}", file=sys.stderr)
+            return model
+    
+    def quantize_model(self, model):
+        # INT8 weights shift reconstruction errors slightly; the 0.4 base threshold
+        # was tuned on the float model, so re-check the anomaly rate after switching
+        try:
+            return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+        except Exception as e:
+            print(f" Dynamic quantization failed, using eager model: {e}", file=sys.stderr)
+            return model
+    
+    def compile_model(self, model):
+        # Persist Inductor's compiled kernels next to the model so restarts hit the cache
+        os.environ.setdefault('TORCHINDUCTOR_CACHE_DIR', str(self.model_path / 'inductor_cache'))
+        
+        try:
+            # Batches range from 1 to MAX_BATCH_SIZE rows, so compile with a symbolic
+            # batch dimension rather than recompiling for every new size
+            compiled = torch.compile(model, mode='reduce-overhead', dynamic=True)
+            
+            # Warm up so the first real prediction doesn't pay the compile cost; size 1
+            # is specialized separately from the dynamic graph, so warm both
+            with torch.inference_mode():
+                for batch_size in (1, 2):
+                    compiled(torch.zeros(batch_size, model.input_size))
+            
+            return compiled
+        except Exception as e:
+            print(f" torch.compile unavailable, using eager model: {e}", file=sys.stderr)
+            return model
+    
+    def feature_indices(self, sensor_type):
+        # A sensor type feeds every feature whose name it contains (e.g. 'ph_level'
+        # feeds both ph_level and level); memoized since the vocabulary is small
+        indices = self._type_to_idx.get(sensor_type)
+        if indices is None:
+            indices = [i for i, name in enumerate(self.feature_names) if name in sensor_type]
+            if len(self._type_to_idx) < LOOKUP_CACHE_SIZE:
+                self._type_to_idx[sensor_type] = indices
+        return indices
+    
+    def criticality_multiplier(self, criticality):
+        criticality = str(criticality).lower()
+        multiplier = self._criticality_to_mult.get(criticality)
+        if multiplier is None:
+            if 'critical' in criticality:
+                multiplier = 0.6  # Very sensitive for critical systems
+            elif 'high' in criticality:
+                multiplier = 0.8  # High sensitivity
             else:
-                # Default values for missing sensors
-                defaults = {
-                    'temperature': 25.0, 'pressure': 1.0, 'flow_rate': 100.0,
-                    'vibration': 0.1, 'current': 5.0, 'voltage': 220.0,
-                    'ph_level': 7.0, 'conductivity': 500.0, 'level': 50.0, 'speed': 1800.0
-                }
-                features.append(defaults.get(feature_name, 0.0))
+                multiplier = 1.0  # Standard increased sensitivity
+            if len(self._criticality_to_mult) < LOOKUP_CACHE_SIZE:
+                self._criticality_to_mult[criticality] = multiplier
+        return multiplier
+    
+    def extract_features(self, sensor_data_list):
+        features = np.empty((len(sensor_data_list), len(self._defaults)), dtype=FEATURE_DTYPE)
+        features[:] = self._defaults
+        for row, sensor_data in enumerate(sensor_data_list):
+            sensor_value = float(sensor_data.get('sensor_value', 0))
+            indices = self.feature_indices(sensor_data.get('sensor_type', '').lower())
+            if indices:
+                features[row, indices] = sensor_value
         
-        return np.array(features).reshape(1, -1)
+        # Rows identical to the defaults (no matching sensor type, or a value equal
+        # to the default) always reconstruct to the same precomputed error
+        is_default = (features == self._defaults).all(axis=1)
+        return features, is_default
     
     def predict_anomaly(self, sensor_data):
+        return self.predict_anomaly_batch([sensor_data])[0]
+    
+    def predict_anomaly_batch(self, sensor_data_list):
         if not self.model_loaded:
-            return {
+            return [{
                 'is_anomaly': False,
                 'anomaly_score': 0.0,
                 'reconstruction_error': 0.0,
                 'confidence': 0.0,
                 'error': 'Model not loaded'
-            }
+            } for _ in sensor_data_list]
         
         try:
             # Extract features
-            features = self.extract_features(sensor_data)
-            
-            # Scale features
-            features_scaled = self.scaler.transform(features)
-            
-            # Convert to tensor
-            input_tensor = torch.FloatTensor(features_scaled)
-            
-            # Get reconstruction
-            with torch.no_grad():
-                reconstruction = self.model(input_tensor)
-            
-            # Calculate reconstruction error
-            reconstruction_error = torch.mean((input_tensor - reconstruction) ** 2).item()
+            features, is_default = self.extract_features(sensor_data_list)
             
-            # Increased sensitivity - Use 85th percentile threshold for higher detection (8-15%)
-            anomaly_threshold = 0.6  # Lower threshold for increased sensitivity
-            
-            # Increased sensitivity settings to cap error rate at 15%
-            # Lower base threshold means more anomalies detected
-            base_threshold = 0.4  # Much more sensitive base threshold
-            severity_multiplier = 1.1
+            # Only run the model on rows that differ from the default vector
+            reconstruction_errors = np.full(len(sensor_data_list), self._default_error, dtype=FEATURE_DTYPE)
+            if not is_default.all():
+                active = ~is_default
+                with self.inference_context():
+                    reconstruction_errors[active] = self.reconstruction_errors(features[active])
             
             # Dynamic threshold based on sensor criticality (all more sensitive)
-            if 'critical' in str(sensor_data.get('criticality', '')).lower():
-                final_threshold = base_threshold * 0.6  # Very sensitive for critical systems
-            elif 'high' in str(sensor_data.get('criticality', '')).lower():
-                final_threshold = base_threshold * 0.8  # High sensitivity
-            else:
-                final_threshold = base_threshold * 1.0  # Standard increased sensitivity
+            thresholds = BASE_THRESHOLD * np.array([
+                self.criticality_multiplier(sensor_data.get('criticality', ''))
+                for sensor_data in sensor_data_list
+            ])
             
-            is_anomaly = reconstruction_error > final_threshold
+        except Exception as e:
+            if len(sensor_data_list) > 1:
+                # Isolate the bad input instead of failing the whole batch
+                return [self.predict_anomaly(sensor_data) for sensor_data in sensor_data_list]
+            return [self.error_result(e)]
+        
+        is_anomaly, thresholds, error_rates, has_window = self.apply_rate_cap(reconstruction_errors, thresholds)
+        
+        # Calculate confidence based on how far above threshold
+        ratio = reconstruction_errors / thresholds
+        confidence = np.where(is_anomaly, np.minimum(ratio - 1.0, 1.0), np.maximum(1.0 - ratio, 0.1))
+        
+        return [{
+            'is_anomaly': anomaly,
+            'anomaly_score': error,
+            'reconstruction_error': error,
+            'confidence': conf,
+            'threshold': threshold,
+            'base_threshold': BASE_THRESHOLD,
+            'current_error_rate': rate,
+            'error_rate_capped': window and rate > 0.15,
+            'model_type': 'autoencoder_enhanced',
+            'sensitivity_level': 'high'
+        } for anomaly, error, conf, threshold, rate, window in zip(
+            is_anomaly.tolist(), reconstruction_errors.tolist(), confidence.tolist(),
+            thresholds.tolist(), error_rates.tolist(), has_window.tolist()
+        )]
+    
+    def apply_rate_cap(self, reconstruction_errors, thresholds):
+        # Cap error rate at 15% - adjust threshold dynamically if too many anomalies.
+        # Each row sees the rate left by the rows before it, so this stays sequential
+        is_anomaly = []
+        final_thresholds = []
+        error_rates = []
+        has_window = []
+        
+        for reconstruction_error, final_threshold in zip(reconstruction_errors.tolist(), thresholds.tolist()):
+            anomaly = reconstruction_error > final_threshold
+            current_error_rate = 0.0
             
-            # Cap error rate at 15% - adjust threshold dynamically if too many anomalies
-            # Keep track of recent anomaly rate and adjust threshold if needed
-            if not hasattr(self, 'recent_predictions'):
-                self.recent_predictions = []
+            if self.error_cap_threshold is None:
                 self.error_cap_threshold = final_threshold
             
-            # Store recent prediction (keep last 100)
-            self.recent_predictions.append(is_anomaly)
-            if len(self.recent_predictions) > 100:
-                self.recent_predictions.pop(0)
+            # Store recent prediction (keep last 100): swap the flag into the slot
+            # being overwritten and adjust the running count by the evicted bit
+            idx = self._recent_idx
+            bit_out = (self._recent_mask >> idx) & 1
+            self._recent_mask = (self._recent_mask & ~(1 << idx)) | (int(anomaly) << idx)
+            self._recent_anomaly_count += int(anomaly) - bit_out
+            self._recent_idx = (idx + 1) % RATE_WINDOW_SIZE
+            self._recent_len = min(self._recent_len + 1, RATE_WINDOW_SIZE)
             
             # Calculate current anomaly rate
-            if len(self.recent_predictions) >= 20:  # Need minimum samples
-                current_error_rate = sum(self.recent_predictions) / len(self.recent_predictions)
+            if self._recent_len >= 20:  # Need minimum samples
+                current_error_rate = self._recent_anomaly_count / self._recent_len
                 
                 # If error rate > 15%, increase threshold to reduce false positives
                 if current_error_rate > 0.15:
                     self.error_cap_threshold = final_threshold * 1.1
-                    is_anomaly = reconstruction_error > self.error_cap_threshold
                     final_threshold = self.error_cap_threshold
+                    anomaly = reconstruction_error > final_threshold
                 # If error rate < 10%, we can be more sensitive
                 elif current_error_rate < 0.10:
                     self.error_cap_threshold = final_threshold * 0.95
-                    is_anomaly = reconstruction_error > self.error_cap_threshold
                     final_threshold = self.error_cap_threshold
-            else:
-                current_error_rate = 0.0
-            
-            # Calculate confidence based on how far above threshold
-            if is_anomaly:
-                confidence = min((reconstruction_error - final_threshold) / final_threshold, 1.0)
-            else:
-                confidence = max(1.0 - (reconstruction_error / final_threshold), 0.1)
-            
-            return {
-                'is_anomaly': bool(is_anomaly),
-                'anomaly_score': float(reconstruction_error),
-                'reconstruction_error': float(reconstruction_error),
-                'confidence': float(confidence),
-                'threshold': final_threshold,
-                'base_threshold': base_threshold,
-                'current_error_rate': float(current_error_rate) if len(self.recent_predictions) >= 20 else 0.0,
-                'error_rate_capped': current_error_rate > 0.15 if len(self.recent_predictions) >= 20 else False,
-                'model_type': 'autoencoder_enhanced',
-                'sensitivity_level': 'high'
-            }
+                    anomaly = reconstruction_error > final_threshold
             
-        except Exception as e:
-            return {
-                'is_anomaly': False,
-                'anomaly_score': 0.0,
-                'reconstruction_error': 0.0,
-                'confidence': 0.0,
-                'current_error_rate': 0.0,
-                'error_rate_capped': False,
-                'threshold': 0.0,
-                'base_threshold': 0.0,
-                'model_type': 'autoencoder_error',
-                'sensitivity_level': 'high',
-                'error': str(e),
-                'error_details': f'Model prediction failed: {type(e).__name__}: {str(e)}'
-            }
+            is_anomaly.append(anomaly)
+            final_thresholds.append(final_threshold)
+            error_rates.append(current_error_rate)
+            has_window.append(self._recent_len >= 20)
+        
+        return (np.array(is_anomaly, dtype=bool), np.array(final_thresholds),
+                np.array(error_rates), np.array(has_window, dtype=bool))
+    
+    def error_result(self, e):
+        return {
+            'is_anomaly': False,
+            'anomaly_score': 0.0,
+            'reconstruction_error': 0.0,
+            'confidence': 0.0,
+            'current_error_rate': 0.0,
+            'error_rate_capped': False,
+            'threshold': 0.0,
+            'base_threshold': 0.0,
+            'model_type': 'autoencoder_error',
+            'sensitivity_level': 'high',
+            'error': str(e),
+            'error_details': f'Model prediction failed: {type(e).__name__}: {str(e)}'
+        }
+
+def read_batches(stream, window=BATCH_WINDOW_SECONDS, max_size=MAX_BATCH_SIZE):
+    """Yield lists of input lines, coalescing lines that arrive within `window` seconds"""
+    import queue
+    import threading
+    
+    lines = queue.Queue()
+    
+    def pump():
+        for line in stream:
+            lines.put(line)
+        lines.put(None)
+    
+    threading.Thread(target=pump, daemon=True).start()
+    
+    while True:
+        line = lines.get()
+        if line is None:
+            return
+        
+        batch = [line]
+        while len(batch) < max_size:
+            try:
+                line = lines.get(timeout=window)
+            except queue.Empty:
+                break
+            if line is None:
+                yield batch
+                return
+            batch.append(line)
+        
+        yield batch
+
+def run_worker(service):
+    """Serve JSON-lines predictions over stdin/stdout with a single loaded model"""
+    for lines in read_batches(sys.stdin.buffer):
+        parsed = []
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                parsed.append(decode_payload(line))
+            except Exception as e:
+                parsed.append(e)
+        
+        # Predict every well-formed line in one batch, keeping response order
+        batch_results = iter(service.predict_anomaly_batch(
+            [item for item in parsed if not isinstance(item, Exception)]))
+        output = []
+        for item in parsed:
+            result = {'error': str(item)} if isinstance(item, Exception) else next(batch_results)
+            output.append(encode_result(result))
+        
+        sys.stdout.buffer.write(b''.join(output))
+        sys.stdout.buffer.flush()
+
+def run_server(service, socket_path):
+    """Serve JSON-lines predictions over a Unix domain socket"""
+    import socketserver
+    import threading
+    
+    predict_lock = threading.Lock()
+    
+    class PredictionHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                line = line.strip()
+                if not line:
+                    continue
+                
+                try:
+                    sensor_data = decode_payload(line)
+                    with predict_lock:
+                        result = service.predict_anomaly(sensor_data)
+                except Exception as e:
+                    result = {'error': str(e)}
+                
+                self.wfile.write(encode_result(result))
+                self.wfile.flush()
+    
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    
+    with socketserver.ThreadingUnixStreamServer(socket_path, PredictionHandler) as server:
+        server.daemon_threads = True
+        print(f" Autoencoder service listening on {socket_path}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        finally:
+            os.unlink(socket_path)
 
 def main():
     if len(sys.argv) < 2:
         print(json.dumps({'error': 'No sensor data provided'}))
         return
     
+    mode = sys.argv[1]
+    
     try:
-        sensor_data = json.loads(sys.argv[1])
-        service = AutoencoderAnomalyService()
-        result = service.predict_anomaly(sensor_data)
-        print(json.dumps(result))
+        if mode == '--worker':
+            run_worker(AutoencoderAnomalyService())
+        elif mode == '--export-onnx':
+            output_path = sys.argv[2] if len(sys.argv) > 2 else None
+            print(json.dumps({'onnx_model': str(AutoencoderAnomalyService().export_onnx(output_path))}))
+        elif mode == '--server':
+            socket_path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_SOCKET_PATH
+            run_server(AutoencoderAnomalyService(), socket_path)
+        else:
+            sensor_data = json.loads(mode)
+            service = AutoencoderAnomalyService()
+            result = service.predict_anomaly(sensor_data)
+            print(json.dumps(result))
         
     except Exception as e:
         print(json.dumps({'error': str(e)}))
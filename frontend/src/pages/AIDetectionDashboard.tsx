@@ -44,6 +44,10 @@ interface AttackWarning {
   recommendations: string[];
 }
 
+// Binary frames carry zlib-compressed JSON, inflated with the browser's native DecompressionStream
+const inflateMessage = (data: ArrayBuffer): Promise<string> =>
+  new Response(new Blob([data]).stream().pipeThrough(new DecompressionStream('deflate'))).text();
+
 const AIDetectionDashboard: React.FC = () => {
   const [detectionResults, setDetectionResults] = useState<DetectionResult[]>([]);
   const [isMonitoring, setIsMonitoring] = useState(false);
@@ -69,13 +73,16 @@ const AIDetectionDashboard: React.FC = () => {
       try {
         // Connect to your ML model's WebSocket endpoint (proxied through Vite)
         wsRef.current = new WebSocket('ws://localhost:8080/ws/ai-detection');
+        // The detection server sends compressed JSON as binary frames
+        wsRef.current.binaryType = 'arraybuffer';
         
         wsRef.current.onopen = () => {
           console.log('Connected to AI Detection WebSocket');
         };
 
-        wsRef.current.onmessage = (event) => {
-          const detection: DetectionResult = JSON.parse(event.data);
+        wsRef.current.onmessage = async (event) => {
+          const payload = typeof event.data === 'string' ? event.data : await inflateMessage(event.data);
+          const detection: DetectionResult = JSON.parse(payload);
           
           setDetectionResults(prev => [detection, ...prev.slice(0, 99)]); // Keep last 100
           setCurrentThreatLevel(detection.threatLevel);
@@ -6,29 +6,150 @@ Generates detailed performance reports, confusion matrices, and visualizations.
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.metrics import classification_report, confusion_matrix, roc_curve, auc
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-import joblib
 import pickle
-import torch
 import os
+import hashlib
+import functools
+import importlib.util
 from datetime import datetime
 import json
 
-# Set style for better plots
-plt.style.use('seaborn-v0_8')
-sns.set_palette("husl")
+# torch, joblib, sklearn, matplotlib and seaborn are imported where they are
+# used so importing this module for ModelAnalyzer alone stays cheap
+PYARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+CSV_ENGINE = 'pyarrow' if PYARROW_AVAILABLE else 'c'
+
+# orjson serializes the metrics (including NumPy scalars) faster than json
+try:
+    import orjson
+    
+    def dump_json(data, path):
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+except ImportError:
+    def dump_json(data, path):
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+
+# Prepared (parsed + encoded) datasets are cached here between runs
+CACHE_DIR = '.cache'
+
+# String columns loaded as categoricals so groupby/encoding work on integer codes
+CATEGORICAL_COLUMNS = ['facility_type', 'device_id', 'sensor_name', 'device_type', 'criticality', 'anomaly_type']
+
+# Column dtypes applied while loading the dataset (CSV or Parquet)
+CSV_SCHEMA = {
+    **{col: 'category' for col in CATEGORICAL_COLUMNS},
+    'is_anomaly': 'int8',
+    'hour_of_day': 'int8',
+    'day_of_week': 'int8',
+    'day_of_year': 'int16',
+}
+
+# Rows per autoencoder forward pass during evaluation
+AUTOENCODER_BATCH_SIZE = 8192
+
+# Rows standardized per float64 step when filling the float32 scaled buffer
+SCALE_CHUNK_ROWS = 8192
+
+# Source column -> (encoder key, encoded feature column), same as training
+ENCODED_COLUMNS = {
+    'facility_type': ('facility', 'facility_encoded'),
+    'device_id': ('device', 'device_encoded'),
+    'sensor_name': ('sensor', 'sensor_encoded'),
+    'device_type': ('device_type', 'device_type_encoded'),
+    'criticality': ('criticality', 'criticality_encoded'),
+}
+
+# Faster line rendering for large series
+PLOT_RC_PARAMS = {
+    'path.simplify': True,
+    'path.simplify_threshold': 1.0,
+    'agg.path.chunksize': 10000,
+    'figure.max_open_warning': 0,
+}
+# Line plots with more points than this are decimated before drawing
+MAX_PLOT_POINTS = 2000
+
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: indices of n_out points preserving the series shape."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    
+    # Bucket edges over the interior points; first and last points are always kept
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    
+    prev = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point) anchors the triangle
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        
+        area = np.abs((x[prev] - avg_x) * (y[start:end] - y[prev])
+                      - (x[prev] - x[start:end]) * (avg_y - y[prev]))
+        prev = start + int(np.argmax(area))
+        selected[i + 1] = prev
+    
+    return selected
+
+
+def downsample_series(x, y, max_points=MAX_PLOT_POINTS):
+    """Decimate an (x, y) series with LTTB when it exceeds max_points."""
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if len(x) <= max_points:
+        return x, y
+    
+    # Datetimes are decimated on their integer representation
+    x_numeric = x.astype('datetime64[ns]').astype(np.int64) if np.issubdtype(x.dtype, np.datetime64) else x
+    idx = lttb_indices(x_numeric, y, max_points)
+    return x[idx], y[idx]
+
+@functools.lru_cache(maxsize=1)
+def load_pyplot():
+    """Import pyplot on the Agg backend the first time a plot is drawn."""
+    import matplotlib
+    matplotlib.use('Agg')  # File-only output, no GUI backend needed
+    import matplotlib.pyplot as plt
+    return plt
+
+
+@functools.lru_cache(maxsize=16)
+def binary_metrics(y_true_bytes, y_pred_bytes):
+    """Metrics for int64 label/prediction buffers, memoized on their contents."""
+    y_true = np.frombuffer(y_true_bytes, dtype=np.int64)
+    y_pred = np.frombuffer(y_pred_bytes, dtype=np.int64)
+    
+    # Binary confusion matrix in a single pass: index = 2*actual + predicted
+    cm = np.bincount(2 * y_true + y_pred, minlength=4).reshape(2, 2)
+    tn, fp, fn, tp = (int(v) for v in cm.ravel())
+    
+    return {
+        'accuracy': (tp + tn) / cm.sum() if cm.sum() else 0.0,
+        'precision': tp / (tp + fp) if tp + fp else 0.0,
+        'recall': tp / (tp + fn) if tp + fn else 0.0,
+        'f1_score': 2 * tp / (2 * tp + fp + fn) if tp + fp + fn else 0.0,
+        'confusion_matrix': cm.tolist(),
+    }
+
 
 class ModelAnalyzer:
     """Comprehensive analyzer for trained anomaly detection models."""
     
-    def __init__(self, data_file='data/industrial_sensor_data_25k.csv', models_dir='models/'):
+    def __init__(self, data_file='data/industrial_sensor_data_25k.parquet', models_dir='models/'):
         self.data_file = data_file
         self.models_dir = models_dir
         self.results = {}
+        self._evaluation = None
         
         print("Initializing Model Analyzer...")
         self.load_data()
@@ -36,10 +157,44 @@ class ModelAnalyzer:
         
     def load_data(self):
         """Load the dataset used for training."""
+        # Fall back to the CSV the fabricator writes when pyarrow is unavailable
+        csv_data_file = os.path.splitext(self.data_file)[0] + '.csv'
+        if not os.path.exists(self.data_file) and os.path.exists(csv_data_file):
+            self.data_file = csv_data_file
+        
         print(f"Loading data from: {self.data_file}")
         
-        self.df = pd.read_csv(self.data_file)
-        self.df['timestamp'] = pd.to_datetime(self.df['timestamp'])
+        self.load_metadata()
+        
+        # Only parse the columns used for features, plots and the report
+        raw_features = [col for col in self.feature_columns if not col.endswith('_encoded')]
+        usecols = list(dict.fromkeys(['timestamp', 'is_anomaly', 'hour_of_day', 'day_of_week',
+                                      *CATEGORICAL_COLUMNS, *raw_features]))
+        
+        cache_path = self.prepared_cache_path(usecols)
+        if cache_path and os.path.exists(cache_path):
+            print(f"Using prepared dataset cache: {cache_path}")
+            self.df = pd.read_parquet(cache_path)
+        else:
+            dtypes = {col: dtype for col, dtype in CSV_SCHEMA.items() if col in usecols}
+            if self.data_file.endswith('.parquet'):
+                self.df = pd.read_parquet(self.data_file, columns=usecols).astype(dtypes)
+            else:
+                self.df = pd.read_csv(
+                    self.data_file,
+                    engine=CSV_ENGINE,
+                    usecols=usecols,
+                    dtype=dtypes,
+                    parse_dates=['timestamp'],
+                )
+            self.encode_features()
+            
+            if cache_path:
+                try:
+                    os.makedirs(CACHE_DIR, exist_ok=True)
+                    self.df.to_parquet(cache_path, compression='zstd')
+                except OSError as e:
+                    print(f"Could not write dataset cache: {e}")
         
         print(f"Dataset loaded: {len(self.df):,} samples")
         print(f"Facilities: {self.df['facility_type'].nunique()}")
@@ -49,38 +204,94 @@ class ModelAnalyzer:
         
         # Prepare features (same as training)
         self.prepare_features()
+        self._compute_aggregates()
         
-    def prepare_features(self):
-        """Prepare features for model evaluation."""
-        # Load metadata to get feature columns and encoders
+    def load_metadata(self):
+        """Load feature columns and encoders saved at training time."""
         with open(f"{self.models_dir}metadata.pkl", 'rb') as f:
             metadata = pickle.load(f)
         
         self.feature_columns = metadata['feature_columns']
         self.encoders = metadata['encoders']
         
-        # Apply same encoding as training
-        self.df['facility_encoded'] = self.encoders['facility'].transform(self.df['facility_type'])
-        self.df['device_encoded'] = self.encoders['device'].transform(self.df['device_id'])
-        self.df['sensor_encoded'] = self.encoders['sensor'].transform(self.df['sensor_name'])
-        self.df['device_type_encoded'] = self.encoders['device_type'].transform(self.df['device_type'])
-        self.df['criticality_encoded'] = self.encoders['criticality'].transform(self.df['criticality'])
-        
+    def prepare_features(self):
+        """Prepare features for model evaluation."""
         # Create feature matrix
         self.X = self.df[self.feature_columns].values
         self.y = self.df['is_anomaly'].values
         
-        # Split data for evaluation
-        self.X_train, self.X_test, self.y_train, self.y_test = train_test_split(
-            self.X, self.y, test_size=0.2, random_state=42, stratify=self.y
-        )
+        # Split data for evaluation; only the held-out rows are materialized
+        test_idx = self._stratified_test_idx(self.y, test_size=0.2, random_state=42)
+        self.X_test = self.X[test_idx]
+        self.y_test = self.y[test_idx]
         
         print(f"Features prepared: {self.X.shape}")
         print(f"Test set: {len(self.X_test):,} samples")
         
+        # Scaled test matrices keyed by scaler parameters
+        self._scaled_cache = {}
+        
+    def _compute_aggregates(self):
+        """Group anomaly labels and sensor values once per key for the plots and the report."""
+        anomalies = self.df['is_anomaly']
+        stats = ['count', 'sum', 'mean']
+        
+        self._agg = {
+            'facility': anomalies.groupby(self.df['facility_type'], observed=True).agg(stats),
+            'facility_device': anomalies.groupby([self.df['facility_type'], self.df['device_id']], observed=True).agg(stats),
+            'facility_sensor': anomalies.groupby([self.df['facility_type'], self.df['sensor_name']], observed=True).agg(stats),
+            'criticality': anomalies.groupby(self.df['criticality'], observed=True).agg(stats),
+            'hour': anomalies.groupby(self.df['hour_of_day']).agg(stats),
+            'weekday': anomalies.groupby(self.df['day_of_week']).agg(stats),
+            'daily': anomalies.groupby(self.df['timestamp'].dt.date).agg(stats),
+            'sensor_stats': self.df['sensor_value'].groupby(self.df['sensor_name'], observed=True).agg(['mean', 'std']),
+        }
+        
+    @staticmethod
+    def _stratified_test_idx(y, test_size, random_state):
+        """Test-row indices of the stratified split used at training time."""
+        from sklearn.model_selection import StratifiedShuffleSplit
+        
+        # Same splitter train_test_split(stratify=y) uses, so the held-out rows match training
+        splitter = StratifiedShuffleSplit(n_splits=1, test_size=test_size, random_state=random_state)
+        _, test_idx = next(splitter.split(np.zeros((len(y), 1)), y))
+        return test_idx
+        
+    def prepared_cache_path(self, usecols):
+        """Cache file for the prepared dataset, keyed by the inputs it was built from."""
+        if not PYARROW_AVAILABLE:
+            return None
+        
+        metadata_file = f"{self.models_dir}metadata.pkl"
+        key = repr((
+            os.path.abspath(self.data_file),
+            os.path.getmtime(self.data_file),
+            os.path.getsize(self.data_file),
+            os.path.getmtime(metadata_file),
+            usecols,
+        ))
+        return os.path.join(CACHE_DIR, f"prepared_{hashlib.sha1(key.encode()).hexdigest()[:16]}.parquet")
+        
+    def encode_features(self):
+        """Apply the same categorical encoding as training."""
+        self.df = self.df.assign(**{
+            encoded: self.encode_column(column, key)
+            for column, (key, encoded) in ENCODED_COLUMNS.items()
+        })
+        
+    def encode_column(self, column, encoder_key):
+        """Map a column onto the training encoder's classes as compact integer codes."""
+        classes = self.encoders[encoder_key].classes_
+        codes = self.df[column].astype(pd.CategoricalDtype(categories=classes)).cat.codes
+        
+        if (codes < 0).any():
+            raise ValueError(f"{column} contains labels unseen during training")
+        return codes
+        
     def load_models(self):
         """Load trained models."""
         print("Loading trained models...")
+        import joblib
         
         self.models = {}
         self.scalers = {}
@@ -88,11 +299,14 @@ class ModelAnalyzer:
         # Load Isolation Forest
         if os.path.exists(f"{self.models_dir}isolation_forest_model.pkl"):
             self.models['isolation_forest'] = joblib.load(f"{self.models_dir}isolation_forest_model.pkl")
+            # Score trees on all cores regardless of how the model was trained
+            self.models['isolation_forest'].n_jobs = -1
             self.scalers['isolation_forest'] = joblib.load(f"{self.models_dir}isolation_forest_scaler.pkl")
             print("Isolation Forest loaded")
         
         # Load Autoencoder
         if os.path.exists(f"{self.models_dir}autoencoder_model.pth"):
+            import torch
             from trainers import IndustrialAutoencoder
             
             # Load scaler
@@ -111,36 +325,47 @@ class ModelAnalyzer:
         """Evaluate all loaded models."""
         print("Evaluating model performance...")
         
+        # Same test data and models give the same predictions; reuse them
+        cache_key = (hashlib.sha1(self.X_test.tobytes()).hexdigest(), tuple(self.models))
+        if self._evaluation is not None and self._evaluation[0] == cache_key:
+            print("Using cached evaluation results")
+            return self._evaluation[1]
+        
         predictions = {}
         
         # Isolation Forest evaluation
         if 'isolation_forest' in self.models:
             print("Evaluating Isolation Forest...")
-            X_scaled = self.scalers['isolation_forest'].transform(self.X_test)
+            X_scaled = self.scaled_test_features(self.scalers['isolation_forest'])
             pred = self.models['isolation_forest'].predict(X_scaled)
             predictions['isolation_forest'] = (pred == -1).astype(int)
         
         # Autoencoder evaluation
         if 'autoencoder' in self.models:
             print("Evaluating Autoencoder...")
-            X_scaled = self.scalers['autoencoder'].transform(self.X_test)
-            X_tensor = torch.FloatTensor(X_scaled)
+            import torch
+            X_scaled = self.scaled_test_features(self.scalers['autoencoder'])
+            model = self.models['autoencoder']
             
-            with torch.no_grad():
-                reconstructed = self.models['autoencoder'](X_tensor)
-                mse = torch.mean((X_tensor - reconstructed) ** 2, dim=1)
-                threshold = torch.quantile(mse, 0.95)  # Top 5% as anomalies
-                pred = (mse > threshold).numpy().astype(int)
+            with torch.inference_mode():
+                # Score in chunks so peak activation memory is bounded by the batch size
+                mse_chunks = []
+                for start in range(0, len(X_scaled), AUTOENCODER_BATCH_SIZE):
+                    batch = torch.from_numpy(X_scaled[start:start + AUTOENCODER_BATCH_SIZE])
+                    mse_chunks.append(torch.mean((batch - model(batch)) ** 2, dim=1))
+                mse = torch.cat(mse_chunks).numpy()
+            
+            threshold = self.quantile_threshold(mse, 0.95)  # Top 5% as anomalies
+            pred = (mse > threshold).astype(int)
             
             predictions['autoencoder'] = pred
         
         # Ensemble prediction
         if len(predictions) > 1:
             print("Evaluating Ensemble...")
-            ensemble_pred = np.zeros(len(self.X_test))
-            for model_name, pred in predictions.items():
-                ensemble_pred += 0.5 * pred  # Equal weights
-            predictions['ensemble'] = (ensemble_pred > 0.5).astype(int)
+            # Equal-weight majority vote on integer flags
+            votes = np.stack(list(predictions.values())).astype(np.int8)
+            predictions['ensemble'] = (votes.sum(axis=0, dtype=np.int16) * 2 > len(votes)).astype(np.int8)
         
         # Calculate metrics for each model
         for model_name, y_pred in predictions.items():
@@ -150,20 +375,42 @@ class ModelAnalyzer:
                 'metrics': metrics
             }
         
+        self._evaluation = (cache_key, predictions)
         return predictions
     
+    @staticmethod
+    def quantile_threshold(values, q):
+        """Linearly interpolated quantile via partial selection instead of a full sort."""
+        rank = q * (len(values) - 1)
+        lower = int(np.floor(rank))
+        upper = min(lower + 1, len(values) - 1)
+        
+        selected = np.partition(values, [lower, upper])
+        return selected[lower] + (selected[upper] - selected[lower]) * (rank - lower)
+    
+    def scaled_test_features(self, scaler):
+        """Scale the test set once per distinct scaler, as contiguous float32."""
+        key = (scaler.mean_.tobytes(), scaler.scale_.tobytes())
+        
+        if key not in self._scaled_cache:
+            mean = scaler.mean_ if scaler.with_mean else 0.0
+            scale = scaler.scale_ if scaler.with_std else 1.0
+            
+            # Both models consume float32: standardize in float64 chunks (same
+            # arithmetic as scaler.transform) straight into one float32 buffer
+            scaled = np.empty(self.X_test.shape, dtype=np.float32)
+            for start in range(0, len(self.X_test), SCALE_CHUNK_ROWS):
+                stop = start + SCALE_CHUNK_ROWS
+                scaled[start:stop] = (self.X_test[start:stop] - mean) / scale
+            self._scaled_cache[key] = scaled
+        return self._scaled_cache[key]
+    
     def calculate_metrics(self, y_true, y_pred, model_name):
         """Calculate comprehensive metrics for a model."""
-        from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
-        
-        metrics = {
-            'accuracy': accuracy_score(y_true, y_pred),
-            'precision': precision_score(y_true, y_pred, zero_division=0),
-            'recall': recall_score(y_true, y_pred, zero_division=0),
-            'f1_score': f1_score(y_true, y_pred, zero_division=0),
-            'confusion_matrix': confusion_matrix(y_true, y_pred).tolist(),
-            'classification_report': classification_report(y_true, y_pred, output_dict=True)
-        }
+        metrics = dict(binary_metrics(
+            np.ascontiguousarray(y_true, dtype=np.int64).tobytes(),
+            np.ascontiguousarray(y_pred, dtype=np.int64).tobytes(),
+        ))
         
         print(f"\n{model_name.upper()} Results:")
         print(f"  Accuracy:  {metrics['accuracy']:.4f}")
@@ -180,6 +427,17 @@ class ModelAnalyzer:
         # Create results directory
         os.makedirs('results', exist_ok=True)
         
+        plt = load_pyplot()
+        import seaborn as sns
+        
+        # Set style for better plots
+        plt.style.use('seaborn-v0_8')
+        plt.rcParams.update(PLOT_RC_PARAMS)
+        sns.set_palette("husl")
+        
+        # One Figure is cleared and resized for every plot instead of recreated
+        self._fig = plt.figure()
+        
         # 1. Performance Comparison
         self.plot_performance_comparison()
         
@@ -195,11 +453,31 @@ class ModelAnalyzer:
         # 5. Time Series Analysis
         self.plot_time_series_analysis()
         
+        load_pyplot().close(self._fig)
+        self._fig = None
+        
         print("All visualizations saved to results/ directory")
     
+    def subplots(self, nrows, ncols, figsize):
+        """Clear the shared Figure and lay out a fresh grid of axes on it."""
+        if getattr(self, '_fig', None) is None:
+            self._fig = load_pyplot().figure()
+        
+        self._fig.clear()
+        self._fig.set_size_inches(figsize)
+        return self._fig, self._fig.subplots(nrows, ncols)
+    
+    def save_figure(self, path):
+        """Save the shared Figure and clear it for the next plot."""
+        self._fig.tight_layout()
+        self._fig.savefig(path, dpi=300, bbox_inches='tight')
+        self._fig.clear()
+    
     def plot_performance_comparison(self):
         """Plot performance comparison across models."""
-        fig, axes = plt.subplots(2, 2, figsize=(15, 12))
+        import seaborn as sns
+        
+        fig, axes = self.subplots(2, 2, figsize=(15, 12))
         fig.suptitle('Model Performance Comparison', fontsize=16, fontweight='bold')
         
         models = list(self.results.keys())
@@ -220,14 +498,12 @@ class ModelAnalyzer:
                 ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.01,
                        f'{value:.3f}', ha='center', va='bottom', fontweight='bold')
         
-        plt.tight_layout()
-        plt.savefig('results/performance_comparison.png', dpi=300, bbox_inches='tight')
-        plt.close()
+        self.save_figure('results/performance_comparison.png')
     
     def plot_confusion_matrices(self):
         """Plot confusion matrices for all models."""
         n_models = len(self.results)
-        fig, axes = plt.subplots(1, n_models, figsize=(5*n_models, 4))
+        fig, axes = self.subplots(1, n_models, figsize=(5*n_models, 4))
         
         if n_models == 1:
             axes = [axes]
@@ -237,35 +513,40 @@ class ModelAnalyzer:
         for idx, (model_name, results) in enumerate(self.results.items()):
             cm = np.array(results['metrics']['confusion_matrix'])
             
-            sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', 
-                       xticklabels=['Normal', 'Anomaly'],
-                       yticklabels=['Normal', 'Anomaly'],
-                       ax=axes[idx])
+            im = axes[idx].imshow(cm, cmap='Blues', aspect='auto')
+            fig.colorbar(im, ax=axes[idx])
+            
+            # Annotate cells, switching to white text on dark cells
+            midpoint = (cm.max() + cm.min()) / 2
+            for (i, j), value in np.ndenumerate(cm):
+                axes[idx].text(j, i, f'{value:d}', ha='center', va='center',
+                               color='white' if value > midpoint else 'black')
+            
+            axes[idx].set_xticks([0, 1], ['Normal', 'Anomaly'])
+            axes[idx].set_yticks([0, 1], ['Normal', 'Anomaly'])
+            axes[idx].grid(False)
             
             axes[idx].set_title(f'{model_name.replace("_", " ").title()}', fontweight='bold')
             axes[idx].set_xlabel('Predicted')
             axes[idx].set_ylabel('Actual')
         
-        plt.tight_layout()
-        plt.savefig('results/confusion_matrices.png', dpi=300, bbox_inches='tight')
-        plt.close()
+        self.save_figure('results/confusion_matrices.png')
     
     def plot_data_distribution(self):
         """Plot data distribution analysis."""
-        fig, axes = plt.subplots(2, 2, figsize=(15, 12))
+        fig, axes = self.subplots(2, 2, figsize=(15, 12))
         fig.suptitle('Dataset Analysis', fontsize=16, fontweight='bold')
         
         # 1. Anomaly distribution by facility
-        facility_anomalies = self.df.groupby('facility_type')['is_anomaly'].agg(['count', 'sum', 'mean'])
-        facility_anomalies['anomaly_rate'] = facility_anomalies['mean'] * 100
+        facility_anomalies = self._agg['facility']
         
-        axes[0,0].bar(facility_anomalies.index, facility_anomalies['anomaly_rate'])
+        axes[0,0].bar(facility_anomalies.index, facility_anomalies['mean'] * 100)
         axes[0,0].set_title('Anomaly Rate by Facility', fontweight='bold')
         axes[0,0].set_ylabel('Anomaly Rate (%)')
         axes[0,0].tick_params(axis='x', rotation=45)
         
         # 2. Sensor value distribution
-        sensor_stats = self.df.groupby('sensor_name')['sensor_value'].agg(['mean', 'std'])
+        sensor_stats = self._agg['sensor_stats']
         axes[0,1].bar(range(len(sensor_stats)), sensor_stats['mean'], yerr=sensor_stats['std'])
         axes[0,1].set_title('Sensor Value Distribution', fontweight='bold')
         axes[0,1].set_ylabel('Average Value')
@@ -273,71 +554,67 @@ class ModelAnalyzer:
         axes[0,1].set_xticklabels(sensor_stats.index, rotation=45)
         
         # 3. Anomaly types distribution
-        anomaly_types = self.df[self.df['is_anomaly'] == 1]['anomaly_type'].value_counts()
+        anomaly_types = self.df[self.df['is_anomaly'] == 1]['anomaly_type'].cat.remove_unused_categories().value_counts()
         axes[1,0].pie(anomaly_types.values, labels=anomaly_types.index, autopct='%1.1f%%')
         axes[1,0].set_title('Anomaly Types Distribution', fontweight='bold')
         
         # 4. Device criticality vs anomalies
-        crit_anomalies = self.df.groupby('criticality')['is_anomaly'].mean() * 100
+        crit_anomalies = self._agg['criticality']['mean'] * 100
         axes[1,1].bar(crit_anomalies.index, crit_anomalies.values)
         axes[1,1].set_title('Anomaly Rate by Device Criticality', fontweight='bold')
         axes[1,1].set_ylabel('Anomaly Rate (%)')
         
-        plt.tight_layout()
-        plt.savefig('results/data_distribution.png', dpi=300, bbox_inches='tight')
-        plt.close()
+        self.save_figure('results/data_distribution.png')
     
     def plot_facility_analysis(self):
         """Plot detailed facility analysis."""
         facilities = self.df['facility_type'].unique()
         
-        fig, axes = plt.subplots(len(facilities), 2, figsize=(15, 5*len(facilities)))
+        fig, axes = self.subplots(len(facilities), 2, figsize=(15, 5*len(facilities)))
         fig.suptitle('Facility-wise Analysis', fontsize=16, fontweight='bold')
         
         for idx, facility in enumerate(facilities):
-            facility_data = self.df[self.df['facility_type'] == facility]
-            
             # Device-wise anomaly count
-            device_anomalies = facility_data.groupby('device_id')['is_anomaly'].sum()
+            device_anomalies = self._agg['facility_device'].loc[facility, 'sum']
             axes[idx, 0].bar(device_anomalies.index, device_anomalies.values)
             axes[idx, 0].set_title(f'{facility.replace("_", " ").title()} - Anomalies by Device')
             axes[idx, 0].set_ylabel('Anomaly Count')
             axes[idx, 0].tick_params(axis='x', rotation=45)
             
             # Sensor-wise anomaly rate
-            sensor_anomalies = facility_data.groupby('sensor_name')['is_anomaly'].mean() * 100
+            sensor_anomalies = self._agg['facility_sensor'].loc[facility, 'mean'] * 100
             axes[idx, 1].bar(sensor_anomalies.index, sensor_anomalies.values)
             axes[idx, 1].set_title(f'{facility.replace("_", " ").title()} - Anomaly Rate by Sensor')
             axes[idx, 1].set_ylabel('Anomaly Rate (%)')
             axes[idx, 1].tick_params(axis='x', rotation=45)
         
-        plt.tight_layout()
-        plt.savefig('results/facility_analysis.png', dpi=300, bbox_inches='tight')
-        plt.close()
+        self.save_figure('results/facility_analysis.png')
     
     def plot_time_series_analysis(self):
         """Plot time series analysis."""
-        fig, axes = plt.subplots(2, 2, figsize=(15, 10))
+        fig, axes = self.subplots(2, 2, figsize=(15, 10))
         fig.suptitle('Time Series Analysis', fontsize=16, fontweight='bold')
         
         # 1. Anomalies over time
-        daily_anomalies = self.df.groupby(self.df['timestamp'].dt.date)['is_anomaly'].agg(['count', 'sum'])
-        daily_anomalies['anomaly_rate'] = daily_anomalies['sum'] / daily_anomalies['count'] * 100
+        daily_anomalies = self._agg['daily']
+        daily_anomalies = daily_anomalies.assign(anomaly_rate=daily_anomalies['sum'] / daily_anomalies['count'] * 100)
         
-        axes[0,0].plot(daily_anomalies.index, daily_anomalies['anomaly_rate'], marker='o')
+        daily_x, daily_y = downsample_series(pd.to_datetime(daily_anomalies.index).to_numpy(),
+                                             daily_anomalies['anomaly_rate'].to_numpy())
+        axes[0,0].plot(daily_x, daily_y, marker='o')
         axes[0,0].set_title('Daily Anomaly Rate', fontweight='bold')
         axes[0,0].set_ylabel('Anomaly Rate (%)')
         axes[0,0].tick_params(axis='x', rotation=45)
         
         # 2. Hourly pattern
-        hourly_anomalies = self.df.groupby('hour_of_day')['is_anomaly'].mean() * 100
+        hourly_anomalies = self._agg['hour']['mean'] * 100
         axes[0,1].bar(hourly_anomalies.index, hourly_anomalies.values)
         axes[0,1].set_title('Hourly Anomaly Pattern', fontweight='bold')
         axes[0,1].set_xlabel('Hour of Day')
         axes[0,1].set_ylabel('Anomaly Rate (%)')
         
         # 3. Weekly pattern
-        weekly_anomalies = self.df.groupby('day_of_week')['is_anomaly'].mean() * 100
+        weekly_anomalies = self._agg['weekday']['mean'] * 100
         day_names = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
         axes[1,0].bar(range(7), weekly_anomalies.values)
         axes[1,0].set_title('Weekly Anomaly Pattern', fontweight='bold')
@@ -348,10 +625,14 @@ class ModelAnalyzer:
         
         # 4. Sample sensor values over time (first 1000 points)
         sample_data = self.df.head(1000)
-        for sensor in sample_data['sensor_name'].unique()[:3]:  # Show first 3 sensors
-            sensor_data = sample_data[sample_data['sensor_name'] == sensor]
-            axes[1,1].plot(sensor_data['timestamp'], sensor_data['sensor_value'], 
-                          label=sensor, alpha=0.7)
+        # One grouping pass; sort=False keeps first-appearance order
+        sensor_groups = sample_data.groupby('sensor_name', observed=True, sort=False)
+        for idx, (sensor, sensor_data) in enumerate(sensor_groups):
+            if idx >= 3:  # Show first 3 sensors
+                break
+            times, values = downsample_series(sensor_data['timestamp'].to_numpy(),
+                                              sensor_data['sensor_value'].to_numpy())
+            axes[1,1].plot(times, values, label=sensor, alpha=0.7)
         
         axes[1,1].set_title('Sample Sensor Values Over Time', fontweight='bold')
         axes[1,1].set_xlabel('Time')
@@ -359,9 +640,7 @@ class ModelAnalyzer:
         axes[1,1].legend()
         axes[1,1].tick_params(axis='x', rotation=45)
         
-        plt.tight_layout()
-        plt.savefig('results/time_series_analysis.png', dpi=300, bbox_inches='tight')
-        plt.close()
+        self.save_figure('results/time_series_analysis.png')
     
     def generate_report(self):
         """Generate comprehensive text report."""
@@ -418,16 +697,16 @@ class ModelAnalyzer:
         report.append("-"*40)
         
         for facility in self.df['facility_type'].unique():
-            facility_data = self.df[self.df['facility_type'] == facility]
-            anomaly_rate = facility_data['is_anomaly'].mean() * 100
-            total_samples = len(facility_data)
-            anomaly_count = facility_data['is_anomaly'].sum()
+            facility_stats = self._agg['facility'].loc[facility]
+            anomaly_rate = facility_stats['mean'] * 100
+            total_samples = int(facility_stats['count'])
+            anomaly_count = int(facility_stats['sum'])
             
             report.append(f"\n{facility.replace('_', ' ').title()}:")
             report.append(f"  Total Samples: {total_samples:,}")
             report.append(f"  Anomalies: {anomaly_count:,}")
             report.append(f"  Anomaly Rate: {anomaly_rate:.2f}%")
-            report.append(f"  Devices: {facility_data['device_id'].nunique()}")
+            report.append(f"  Devices: {len(self._agg['facility_device'].loc[facility])}")
         
         # Recommendations
         report.append("\nRECOMMENDATIONS")
@@ -501,8 +780,7 @@ class ModelAnalyzer:
                 'confusion_matrix': metrics['confusion_matrix']
             }
         
-        with open('results/model_metrics.json', 'w') as f:
-            json.dump(metrics_json, f, indent=2)
+        dump_json(metrics_json, 'results/model_metrics.json')
         
         print("Metrics saved to results/model_metrics.json")
     
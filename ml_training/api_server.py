@@ -5,11 +5,17 @@ Bridges the ML model with the frontend dashboard and handles attack simulations
 """
 
 import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+import importlib.util
+import inspect
 import json
+import os
+from pathlib import Path
+from string import Template
 import pandas as pd
 import numpy as np
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import uvicorn
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
@@ -17,8 +23,40 @@ from pydantic import BaseModel
 import threading
 import time
 import random
+import zlib
+import torch
 
 from reconstruction_autoencoder import GridAnomalyDetector, ElectricalGridReconstructionAutoencoder
+from realtime_features import SENSOR_VALUE_FEATURES, build_feature_vector
+
+# orjson serializes WebSocket payloads several times faster than json
+try:
+    import orjson
+    
+    def encode_message(data) -> bytes:
+        return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
+except ImportError:
+    def encode_message(data) -> bytes:
+        return json.dumps(data).encode('utf-8')
+
+# Detection requests arriving within this window share one forward pass
+BATCH_WINDOW_SECONDS = 0.005
+MAX_BATCH_SIZE = 128
+
+# Undelivered messages buffered per WebSocket client before the oldest is dropped
+CLIENT_QUEUE_SIZE = 64
+
+# ONNX export of the autoencoder, rebuilt whenever the PyTorch weights are newer
+ONNX_MODEL_PATH = 'models/electrical_grid_autoencoder.onnx'
+
+# Pin the TorchScript exporter where torch.onnx.export takes `dynamo` (torch 2.5+); older releases only have that exporter
+ONNX_EXPORT_OPTIONS = {'dynamo': False} if 'dynamo' in inspect.signature(torch.onnx.export).parameters else {}
+
+# Validation data columns streamed through the model as sensor readings
+STREAM_COLUMNS = [
+    'device_id', 'sensor_name', 'sensor_value', 'nominal_value', 'device_type',
+    'voltage_level', 'sensor_unit', 'tolerance_percent', 'criticality'
+]
 
 class SensorData(BaseModel):
     device_id: str
@@ -46,16 +84,138 @@ class DetectionResult(BaseModel):
     threatLevel: str
     sensorData: Dict
 
+# Attack script written for the external VM, compiled once at import time
+ATTACK_SCRIPT_TEMPLATE = Template('''#!/usr/bin/env python3
+"""
+Attack Simulation Script - $attack_type
+Generated for execution on external VM
+"""
+
+import requests
+import time
+import random
+from datetime import datetime
+
+def execute_attack():
+    print("🚨 Starting $attack_type on $target_device")
+    
+    # Attack parameters based on type
+    attack_params = {
+        'voltage_sag_attack': {'multiplier': 0.6, 'variation': 0.1},
+        'power_overload_attack': {'multiplier': 2.5, 'variation': 0.3},
+        'frequency_attack': {'base_freq': 58.5, 'variation': 1.0},
+        'zero_day_attack': {'multiplier': 0.3, 'variation': 0.5}
+    }
+    
+    params = attack_params.get('$attack_type', {'multiplier': 1.5, 'variation': 0.2})
+    
+    # Simulate attack for $duration seconds
+    end_time = time.time() + $duration
+    
+    while time.time() < end_time:
+        try:
+            # Generate malicious sensor data
+            if '$attack_type' == 'voltage_sag_attack':
+                sensor_data = {
+                    'device_id': '$target_device',
+                    'sensor_name': 'voltage',
+                    'sensor_value': 345000 * params['multiplier'] * (1 + random.uniform(-params['variation'], params['variation'])),
+                    'nominal_value': 345000,
+                    'device_type': 'transmission_line',
+                    'voltage_level': 'transmission',
+                    'sensor_unit': 'V',
+                    'tolerance_percent': 5.0,
+                    'criticality': 'critical'
+                }
+            elif '$attack_type' == 'power_overload_attack':
+                sensor_data = {
+                    'device_id': '$target_device',
+                    'sensor_name': 'active_power',
+                    'sensor_value': 400000 * params['multiplier'] * (1 + random.uniform(-params['variation'], params['variation'])),
+                    'nominal_value': 400000,
+                    'device_type': 'transmission_line',
+                    'voltage_level': 'transmission',
+                    'sensor_unit': 'kW',
+                    'tolerance_percent': 30.0,
+                    'criticality': 'critical'
+                }
+            elif '$attack_type' == 'frequency_attack':
+                sensor_data = {
+                    'device_id': '$target_device',
+                    'sensor_name': 'frequency',
+                    'sensor_value': params['base_freq'] + random.uniform(-params['variation'], params['variation']),
+                    'nominal_value': 60.0,
+                    'device_type': 'transmission_line',
+                    'voltage_level': 'transmission',
+                    'sensor_unit': 'Hz',
+                    'tolerance_percent': 0.1,
+                    'criticality': 'critical'
+                }
+            else:  # zero_day_attack
+                sensor_data = {
+                    'device_id': '$target_device',
+                    'sensor_name': 'voltage',
+                    'sensor_value': 345000 * params['multiplier'] * (1 + random.uniform(-params['variation'], params['variation'])),
+                    'nominal_value': 345000,
+                    'device_type': 'transmission_line',
+                    'voltage_level': 'transmission',
+                    'sensor_unit': 'V',
+                    'tolerance_percent': 5.0,
+                    'criticality': 'critical'
+                }
+            
+            # Send attack data to detection API
+            response = requests.post(
+                'http://localhost:8000/detect',
+                json=sensor_data,
+                timeout=5
+            )
+            
+            if response.status_code == 200:
+                result = response.json()
+                print(f"Attack data sent - Anomaly detected: {result['isAnomaly']}")
+            else:
+                print(f"Failed to send attack data: {response.status_code}")
+            
+            time.sleep(2)  # Send attack data every 2 seconds
+            
+        except Exception as e:
+            print(f"Attack execution error: {e}")
+            time.sleep(1)
+    
+    print("🏁 Attack simulation completed")
+
+if __name__ == "__main__":
+    execute_attack()
+''')
+
 class RealTimeDetectionServer:
     def __init__(self):
         self.app = FastAPI(title="AI Anomaly Detection Server")
         self.detector = GridAnomalyDetector()
         self.model_loaded = False
-        self.active_connections: List[WebSocket] = []
+        self.active_connections: List[Tuple[WebSocket, asyncio.Queue]] = []
         self.data_stream_active = False
         self.attack_simulation_active = False
         self.attack_data_queue = []
         
+        # Feature rows waiting for the next batched forward pass, per event loop
+        self._pending_batches: Dict[asyncio.AbstractEventLoop, list] = {}
+        self.ort_session = None
+        self._dtype = torch.float32
+        
+        # Event loop serving the app, captured at startup for the data stream thread
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_ready = threading.Event()
+        
+        # Bounded pool for blocking work: the data stream and attack script writes
+        self._io_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='srv-io')
+        self._stream_future: Optional[Future] = None
+        
+        # Scaling and the forward pass run off the event loop; one worker keeps
+        # batches from contending for the intra-op threads of ORT/PyTorch
+        self._inference_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='srv-infer')
+        
         # Statistics
         self.stats = {
             'total_samples': 0,
@@ -85,7 +245,6 @@ class RealTimeDetectionServer:
             
             # Load the trained model components
             import joblib
-            import torch
             
             self.detector.scaler = joblib.load('models/feature_scaler.pkl')
             self.detector.label_encoders = joblib.load('models/label_encoders.pkl')
@@ -98,6 +257,32 @@ class RealTimeDetectionServer:
             self.detector.autoencoder.load_state_dict(torch.load('models/electrical_grid_autoencoder.pth'))
             self.detector.autoencoder.eval()
             
+            # Half precision halves memory traffic for the GPU forward pass
+            if self.detector.device.type == 'cuda':
+                self.detector.autoencoder.half()
+                self._dtype = torch.float16
+            
+            # ONNX Runtime replaces eager PyTorch for CPU inference when available
+            if self.detector.device.type == 'cpu':
+                self.ort_session = self.load_onnx_session(input_dim)
+            
+            # Slot of each named feature in the model input vector
+            self._feature_index = {name: i for i, name in enumerate(self.detector.feature_columns)}
+            self._sensor_value_slots = np.array([self._feature_index[name] for name in SENSOR_VALUE_FEATURES])
+            
+            # Every row starts as zeros, which is what rolling std, rate of change and z-score take
+            # without history; only the sensor-value, nominal/tolerance, time and categorical slots are written
+            self._feature_template = np.zeros(len(self._feature_index), dtype=np.float64)
+            
+            # Pay graph optimization / CUDA init before the first real request does
+            self.warm_up_model(input_dim)
+            
+            # Label -> code lookups, replacing a LabelEncoder.transform call per field per request
+            self._cat_maps = {
+                feature: {label: code for code, label in enumerate(encoder.classes_)}
+                for feature, encoder in self.detector.label_encoders.items()
+            }
+            
             self.model_loaded = True
             print("✅ AI model loaded successfully!")
             print(f"🎯 Reconstruction threshold: {self.detector.reconstruction_threshold:.6f}")
@@ -106,9 +291,74 @@ class RealTimeDetectionServer:
             print(f"❌ Failed to load model: {e}")
             self.model_loaded = False
     
+    def warm_up_model(self, input_dim: int):
+        """Run dummy batches of the expected sizes through the inference path."""
+        for batch_size in [1, 1, 1, MAX_BATCH_SIZE]:
+            self.run_inference(np.zeros((batch_size, input_dim), dtype=np.float32))
+    
+    def load_onnx_session(self, input_dim: int):
+        """Export the autoencoder to ONNX if needed and open an ONNX Runtime session."""
+        try:
+            import onnxruntime as ort
+            
+            weights_path = 'models/electrical_grid_autoencoder.pth'
+            if (not os.path.exists(ONNX_MODEL_PATH)
+                    or os.path.getmtime(ONNX_MODEL_PATH) < os.path.getmtime(weights_path)):
+                torch.onnx.export(
+                    self.detector.autoencoder, torch.zeros(1, input_dim), ONNX_MODEL_PATH,
+                    input_names=['input'], output_names=['output'],
+                    dynamic_axes={'input': {0: 'batch'}, 'output': {0: 'batch'}},
+                    opset_version=17, **ONNX_EXPORT_OPTIONS
+                )
+            
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            session = ort.InferenceSession(ONNX_MODEL_PATH, sess_options=options,
+                                           providers=['CPUExecutionProvider'])
+            print("⚡ ONNX Runtime inference enabled")
+            return session
+            
+        except Exception as e:
+            print(f"⚠️ ONNX Runtime unavailable, using PyTorch inference: {e}")
+            return None
+    
+    def run_inference(self, X_scaled: np.ndarray):
+        """Return predictions, anomaly scores and reconstruction errors for a scaled batch."""
+        X = X_scaled.astype(np.float32)
+        
+        if self.ort_session is not None:
+            reconstructed = self.ort_session.run(None, {'input': X})[0]
+            
+            # Squared error summed per row in one pass, reusing the output buffer for the difference
+            np.subtract(reconstructed, X, out=reconstructed)
+            reconstruction_errors = np.einsum('ij,ij->i', reconstructed, reconstructed) / X.shape[1]
+        else:
+            with torch.inference_mode():
+                X_tensor = torch.from_numpy(X).to(self.detector.device, non_blocking=True)
+                reconstructed = self.detector.autoencoder(X_tensor.to(self._dtype)).float()
+                reconstructed.sub_(X_tensor)
+                reconstruction_errors = (torch.einsum('ij,ij->i', reconstructed, reconstructed) / X.shape[1]).cpu().numpy()
+        
+        anomaly_scores = reconstruction_errors / self.detector.reconstruction_threshold
+        predictions = (reconstruction_errors > self.detector.reconstruction_threshold).astype(int)
+        
+        return predictions, anomaly_scores, reconstruction_errors
+    
     def setup_routes(self):
         """Setup API routes."""
         
+        @self.app.on_event("startup")
+        async def capture_event_loop():
+            self._loop = asyncio.get_running_loop()
+            self._loop_ready.set()
+        
+        @self.app.on_event("shutdown")
+        async def stop_data_stream():
+            # Let the stream finish its in-flight detection while the loop is still running
+            self.data_stream_active = False
+            if self._stream_future is not None:
+                await asyncio.wrap_future(self._stream_future)
+        
         @self.app.get("/health")
         async def health_check():
             return {
@@ -150,9 +400,10 @@ class RealTimeDetectionServer:
                 # Create attack script that VM can execute
                 attack_script = self.generate_attack_script(attack)
                 
-                # Save attack script to a location accessible by VM
-                with open('attack_simulation.py', 'w') as f:
-                    f.write(attack_script)
+                # Save attack script to a location accessible by VM, off the event loop
+                await asyncio.get_running_loop().run_in_executor(
+                    self._io_pool, Path('attack_simulation.py').write_text, attack_script
+                )
                 
                 # Schedule attack to stop after duration
                 threading.Timer(attack.duration, self.stop_attack_simulation).start()
@@ -171,62 +422,35 @@ class RealTimeDetectionServer:
         @self.app.websocket("/ws/ai-detection")
         async def websocket_endpoint(websocket: WebSocket):
             await websocket.accept()
-            self.active_connections.append(websocket)
+            
+            # Broadcasts only enqueue; a per-client relay task does the socket writes
+            client = (websocket, asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE))
+            self.active_connections.append(client)
+            relay = asyncio.create_task(self.relay_messages(*client))
             
             try:
-                while True:
-                    # Keep connection alive and send periodic updates
-                    await asyncio.sleep(1)
+                # Park until the client disconnects; anything it sends is ignored
+                while (await websocket.receive())['type'] != 'websocket.disconnect':
+                    pass
                     
             except WebSocketDisconnect:
-                self.active_connections.remove(websocket)
+                pass
+            finally:
+                relay.cancel()
+                if client in self.active_connections:
+                    self.active_connections.remove(client)
     
     async def process_detection(self, sensor_data: Dict) -> DetectionResult:
         """Process sensor data through the AI model."""
         try:
-            # Convert sensor data to DataFrame format expected by the model
-            df = pd.DataFrame([{
-                'timestamp': datetime.now(),
-                'facility_type': 'electrical_grid',
-                'device_id': sensor_data['device_id'],
-                'device_type': sensor_data['device_type'],
-                'sensor_name': sensor_data['sensor_name'],
-                'sensor_value': sensor_data['sensor_value'],
-                'sensor_unit': sensor_data['sensor_unit'],
-                'voltage_level': sensor_data['voltage_level'],
-                'nominal_value': sensor_data['nominal_value'],
-                'tolerance_percent': sensor_data['tolerance_percent'],
-                'criticality': sensor_data['criticality'],
-                'is_anomaly': 0,
-                'anomaly_type': None,
-                'hour_of_day': datetime.now().hour,
-                'day_of_week': datetime.now().weekday(),
-                'day_of_year': datetime.now().timetuple().tm_yday,
-                'operational_state': 'unknown'
-            }])
-            
-            # Add time-series features (simplified for real-time)
-            for window in [5, 10, 30]:
-                df[f'rolling_mean_{window}'] = df['sensor_value']
-                df[f'rolling_std_{window}'] = 0
-            
-            for lag in [1, 5, 10]:
-                df[f'lag_{lag}'] = df['sensor_value']
-            
-            df['rate_of_change'] = 0
-            df['deviation_from_nominal'] = abs(df['sensor_value'] - df['nominal_value']) / df['nominal_value']
-            df['z_score'] = 0
-            
-            # Prepare features and get prediction
-            X = self.detector.prepare_features(df)
-            X_scaled = self.detector.scaler.transform(X)
-            
-            predictions, anomaly_scores, reconstruction_errors = self.detector.detect_anomalies(X_scaled)
+            features = self.build_feature_vector(sensor_data)
+            
+            prediction, anomaly_score, reconstruction_error = await self.submit_for_batch(features)
             
             # Determine threat level
-            is_anomaly = bool(predictions[0])
-            anomaly_score = float(anomaly_scores[0])
-            reconstruction_error = float(reconstruction_errors[0])
+            is_anomaly = bool(prediction)
+            anomaly_score = float(anomaly_score)
+            reconstruction_error = float(reconstruction_error)
             
             if is_anomaly:
                 error_ratio = reconstruction_error / self.detector.reconstruction_threshold
@@ -268,128 +492,77 @@ class RealTimeDetectionServer:
             print(f"Detection error: {e}")
             raise
     
-    async def broadcast_detection(self, result: DetectionResult):
-        """Broadcast detection result to all connected WebSocket clients."""
-        if self.active_connections:
-            message = result.json()
-            disconnected = []
-            
-            for connection in self.active_connections:
-                try:
-                    await connection.send_text(message)
-                except:
-                    disconnected.append(connection)
-            
-            # Remove disconnected clients
-            for connection in disconnected:
-                self.active_connections.remove(connection)
+    def build_feature_vector(self, sensor_data: Dict) -> np.ndarray:
+        """Build the model input row for one reading without going through pandas."""
+        return build_feature_vector(sensor_data, self._feature_template, self._feature_index,
+                                    self._sensor_value_slots, self._cat_maps)
     
-    def generate_attack_script(self, attack: AttackSimulation) -> str:
-        """Generate attack script that can be executed by external VM."""
-        script = f'''#!/usr/bin/env python3
-"""
-Attack Simulation Script - {attack.attackType}
-Generated for execution on external VM
-"""
-
-import requests
-import time
-import random
-from datetime import datetime
-
-def execute_attack():
-    print("🚨 Starting {attack.attackType} on {attack.targetDevice}")
+    def submit_for_batch(self, features: np.ndarray) -> asyncio.Future:
+        """Queue one feature row for the next batched forward pass."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        
+        batch = self._pending_batches.get(loop)
+        if batch is None:
+            batch = self._pending_batches[loop] = []
+            loop.create_task(self.flush_batch(loop))
+        batch.append((features, future))
+        
+        return future
     
-    # Attack parameters based on type
-    attack_params = {{
-        'voltage_sag_attack': {{'multiplier': 0.6, 'variation': 0.1}},
-        'power_overload_attack': {{'multiplier': 2.5, 'variation': 0.3}},
-        'frequency_attack': {{'base_freq': 58.5, 'variation': 1.0}},
-        'zero_day_attack': {{'multiplier': 0.3, 'variation': 0.5}}
-    }}
+    async def flush_batch(self, loop: asyncio.AbstractEventLoop):
+        """Collect rows for one batching window, then score them together."""
+        await asyncio.sleep(BATCH_WINDOW_SECONDS)
+        batch = self._pending_batches.pop(loop, [])
+        
+        for start in range(0, len(batch), MAX_BATCH_SIZE):
+            chunk = batch[start:start + MAX_BATCH_SIZE]
+            try:
+                predictions, anomaly_scores, reconstruction_errors = await loop.run_in_executor(
+                    self._inference_pool, self.score_batch, [features for features, _ in chunk]
+                )
+            except Exception as e:
+                for _, future in chunk:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for i, (_, future) in enumerate(chunk):
+                if not future.done():
+                    future.set_result((predictions[i], anomaly_scores[i], reconstruction_errors[i]))
     
-    params = attack_params.get('{attack.attackType}', {{'multiplier': 1.5, 'variation': 0.2}})
+    def score_batch(self, rows: List[np.ndarray]):
+        """Scale a batch of feature rows and run them through the model."""
+        X_scaled = self.detector.scaler.transform(np.vstack(rows))
+        return self.run_inference(X_scaled)
     
-    # Simulate attack for {attack.duration} seconds
-    end_time = time.time() + {attack.duration}
+    async def broadcast_detection(self, result: DetectionResult):
+        """Broadcast detection result to all connected WebSocket clients."""
+        if self.active_connections:
+            # Serialized and compressed once, then sent as the same binary frame to every client
+            message = zlib.compress(encode_message(result.dict()), 1)
+            
+            for _, queue in self.active_connections:
+                if queue.full():
+                    queue.get_nowait()  # Slow client: drop its oldest pending message
+                queue.put_nowait(message)
     
-    while time.time() < end_time:
+    async def relay_messages(self, websocket: WebSocket, queue: asyncio.Queue):
+        """Write queued broadcasts to one client until its connection fails."""
         try:
-            # Generate malicious sensor data
-            if '{attack.attackType}' == 'voltage_sag_attack':
-                sensor_data = {{
-                    'device_id': '{attack.targetDevice}',
-                    'sensor_name': 'voltage',
-                    'sensor_value': 345000 * params['multiplier'] * (1 + random.uniform(-params['variation'], params['variation'])),
-                    'nominal_value': 345000,
-                    'device_type': 'transmission_line',
-                    'voltage_level': 'transmission',
-                    'sensor_unit': 'V',
-                    'tolerance_percent': 5.0,
-                    'criticality': 'critical'
-                }}
-            elif '{attack.attackType}' == 'power_overload_attack':
-                sensor_data = {{
-                    'device_id': '{attack.targetDevice}',
-                    'sensor_name': 'active_power',
-                    'sensor_value': 400000 * params['multiplier'] * (1 + random.uniform(-params['variation'], params['variation'])),
-                    'nominal_value': 400000,
-                    'device_type': 'transmission_line',
-                    'voltage_level': 'transmission',
-                    'sensor_unit': 'kW',
-                    'tolerance_percent': 30.0,
-                    'criticality': 'critical'
-                }}
-            elif '{attack.attackType}' == 'frequency_attack':
-                sensor_data = {{
-                    'device_id': '{attack.targetDevice}',
-                    'sensor_name': 'frequency',
-                    'sensor_value': params['base_freq'] + random.uniform(-params['variation'], params['variation']),
-                    'nominal_value': 60.0,
-                    'device_type': 'transmission_line',
-                    'voltage_level': 'transmission',
-                    'sensor_unit': 'Hz',
-                    'tolerance_percent': 0.1,
-                    'criticality': 'critical'
-                }}
-            else:  # zero_day_attack
-                sensor_data = {{
-                    'device_id': '{attack.targetDevice}',
-                    'sensor_name': 'voltage',
-                    'sensor_value': 345000 * params['multiplier'] * (1 + random.uniform(-params['variation'], params['variation'])),
-                    'nominal_value': 345000,
-                    'device_type': 'transmission_line',
-                    'voltage_level': 'transmission',
-                    'sensor_unit': 'V',
-                    'tolerance_percent': 5.0,
-                    'criticality': 'critical'
-                }}
-            
-            # Send attack data to detection API
-            response = requests.post(
-                'http://localhost:8000/detect',
-                json=sensor_data,
-                timeout=5
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                print(f"Attack data sent - Anomaly detected: {{result['isAnomaly']}}")
-            else:
-                print(f"Failed to send attack data: {{response.status_code}}")
-            
-            time.sleep(2)  # Send attack data every 2 seconds
-            
-        except Exception as e:
-            print(f"Attack execution error: {{e}}")
-            time.sleep(1)
+            while True:
+                message = await queue.get()
+                await websocket.send_bytes(message)
+        except Exception:
+            pass
     
-    print("🏁 Attack simulation completed")
-
-if __name__ == "__main__":
-    execute_attack()
-'''
-        return script
+    def generate_attack_script(self, attack: AttackSimulation) -> str:
+        """Generate attack script that can be executed by external VM."""
+        return ATTACK_SCRIPT_TEMPLATE.substitute(
+            attack_type=attack.attackType,
+            target_device=attack.targetDevice,
+            duration=attack.duration
+        )
     
     def stop_attack_simulation(self):
         """Stop the current attack simulation."""
@@ -406,34 +579,32 @@ if __name__ == "__main__":
                 # Sample data for streaming
                 sample_data = df.sample(n=min(1000, len(df))).reset_index(drop=True)
                 
-                self.data_stream_active = True
+                # Detections run on the server loop, where the WebSocket clients live
+                self._loop_ready.wait()
+                
+                # Plain per-column lists avoid boxing every row into a Series
+                columns = sample_data[STREAM_COLUMNS].to_dict('list')
                 
-                for _, row in sample_data.iterrows():
+                for i in range(len(sample_data)):
                     if not self.data_stream_active:
                         break
                     
-                    sensor_data = {
-                        'device_id': row['device_id'],
-                        'sensor_name': row['sensor_name'],
-                        'sensor_value': row['sensor_value'],
-                        'nominal_value': row['nominal_value'],
-                        'device_type': row['device_type'],
-                        'voltage_level': row['voltage_level'],
-                        'sensor_unit': row['sensor_unit'],
-                        'tolerance_percent': row['tolerance_percent'],
-                        'criticality': row['criticality']
-                    }
+                    sensor_data = {name: values[i] for name, values in columns.items()}
                     
                     # Process through model
-                    asyncio.run(self.process_detection(sensor_data))
+                    asyncio.run_coroutine_threadsafe(self.process_detection(sensor_data), self._loop).result()
                     
                     time.sleep(1)  # 1 second between samples
                     
             except Exception as e:
                 print(f"Data streaming error: {e}")
         
-        # Start streaming in background thread
-        threading.Thread(target=stream_data, daemon=True).start()
+        # Only one stream at a time, run on the shared I/O pool
+        if self._stream_future is not None and not self._stream_future.done():
+            return
+        
+        self.data_stream_active = True
+        self._stream_future = self._io_pool.submit(stream_data)
     
     def run(self, host="0.0.0.0", port=8000):
         """Run the API server."""
@@ -450,7 +621,22 @@ if __name__ == "__main__":
         # Start data streaming
         self.start_data_stream()
         
-        uvicorn.run(self.app, host=host, port=port)
+        # uvloop/httptools speed up socket I/O where installed (uvloop has no Windows build)
+        try:
+            uvicorn.run(
+                self.app, host=host, port=port,
+                loop='uvloop' if importlib.util.find_spec('uvloop') else 'asyncio',
+                http='httptools' if importlib.util.find_spec('httptools') else 'h11',
+                ws='websockets',
+                # Payloads are compressed once in broadcast_detection, not per connection
+                ws_per_message_deflate=False
+            )
+        finally:
+            # Release a stream still waiting for a server loop that never started
+            self.data_stream_active = False
+            self._loop_ready.set()
+            self._io_pool.shutdown(wait=False)
+            self._inference_pool.shutdown(wait=False)
 
 def main():
     server = RealTimeDetectionServer()
@@ -186,43 +186,88 @@ class ElectricalGridAttackGenerator:
         return zero_day_attack
     
     def generate_attack_dataset(self, normal_samples: pd.DataFrame, num_attacks: int = 10000) -> pd.DataFrame:
-        """Generate comprehensive attack dataset from normal samples."""
+        """Generate comprehensive attack dataset from normal samples.
+        
+        Vectorized equivalent of applying the per-sample generators above:
+        each of the ``num_attacks`` draws picks a base sample and an attack
+        family, and may add a Stuxnet-style or zero-day variant.
+        """
         print(f"🎯 Generating {num_attacks} attack samples for testing...")
         
-        attacks = []
-        normal_sample_list = normal_samples.to_dict('records')
+        sensor_names = normal_samples['sensor_name'].to_numpy()
+        sensor_values = normal_samples['sensor_value'].to_numpy(dtype=np.float64)
         
-        for i in range(num_attacks):
-            # Select random normal sample as base
-            base_sample = random.choice(normal_sample_list)
-            
-            # Generate different types of attacks
-            attack_types = [
-                self.generate_voltage_attacks,
-                self.generate_frequency_attacks,
-                self.generate_power_attacks,
-                self.generate_harmonic_attacks,
-                self.generate_temperature_attacks
-            ]
-            
-            # Choose random attack type
-            attack_generator = random.choice(attack_types)
-            generated_attacks = attack_generator(base_sample)
-            
-            if generated_attacks:
-                attacks.extend(generated_attacks)
-            
-            # Occasionally generate sophisticated attacks
-            if np.random.random() < 0.1:  # 10% chance
-                stuxnet_attack = self.generate_stuxnet_style_attack(base_sample)
-                attacks.append(stuxnet_attack)
-            
-            if np.random.random() < 0.05:  # 5% chance
-                zero_day_attack = self.generate_zero_day_attack(base_sample)
-                attacks.append(zero_day_attack)
+        # Draw base sample, attack family and sophisticated variants for every draw at once
+        base_idx = np.random.randint(0, len(normal_samples), num_attacks)
+        family = np.random.randint(0, 5, num_attacks)
+        add_stuxnet = np.random.random(num_attacks) < 0.1  # 10% chance
+        add_zero_day = np.random.random(num_attacks) < 0.05  # 5% chance
+        
+        names = sensor_names[base_idx]
+        values = sensor_values[base_idx]
+        
+        draws, slots, attack_values, attack_types = [], [], [], []
+        
+        def emit(mask, slot, value, attack_type):
+            rows = np.flatnonzero(mask)
+            draws.append(rows)
+            slots.append(np.full(len(rows), slot))
+            attack_values.append(np.broadcast_to(value, len(rows)).astype(np.float64))
+            attack_types.append(np.full(len(rows), attack_type, dtype=object))
+        
+        # Voltage attacks
+        mask = (family == 0) & (names == 'voltage')
+        v = values[mask]
+        emit(mask, 0, v * 0.6, 'voltage_sag_attack')
+        emit(mask, 1, v * 1.4, 'voltage_swell_attack')
+        emit(mask, 2, v * (1 + 0.3 * np.sin(np.random.random(len(v)) * 10)), 'voltage_instability_attack')
+        
+        # Frequency attacks
+        mask = (family == 1) & (names == 'frequency')
+        emit(mask, 0, 58.5, 'under_frequency_attack')
+        emit(mask, 1, 61.5, 'over_frequency_attack')
+        emit(mask, 2, 60.0 + 0.5 * np.sin(np.random.random(mask.sum()) * 20), 'frequency_oscillation_attack')
+        
+        # Power attacks
+        mask = (family == 2) & np.isin(names, ['active_power', 'apparent_power'])
+        v = values[mask]
+        emit(mask, 0, v * 2.5, 'power_overload_attack')
+        emit(mask, 1, v * 0.2, 'power_drop_attack')
+        emit(mask, 2, v * 3.0, 'power_spike_attack')
+        
+        # Harmonic attacks
+        emit((family == 3) & (names == 'thd'), 0, 15.0, 'harmonic_distortion_attack')
+        
+        # Temperature attacks
+        mask = (family == 4) & (names == 'temperature')
+        emit(mask, 0, 120.0, 'overheating_attack')
+        emit(mask, 1, -20.0, 'thermal_shock_attack')
+        
+        # Stuxnet-style attacks
+        n, v = names[add_stuxnet], values[add_stuxnet]
+        r = np.random.random(len(v))
+        v = np.where(n == 'frequency', 60.0 + 0.15 * np.sin(r * 100), v)
+        v = np.where(n == 'voltage', v * (1 + 0.08 * np.sin(r * 50)), v)
+        v = np.where(n == 'current', v * (1 + 0.12 * r), v)
+        emit(add_stuxnet, 3, v, 'stuxnet_style_attack')
+        
+        # Zero-day attacks
+        n, v = names[add_zero_day], values[add_zero_day]
+        r = np.random.random(len(v))
+        v = np.where(n == 'voltage', v * (1 + 0.2 * np.cos(r * 30)), v)
+        v = np.where(n == 'power_factor', np.maximum(0.5, v - 0.3), v)
+        v = np.where(n == 'thd', v + 3.0 + 2.0 * r, v)
+        emit(add_zero_day, 4, v, 'zero_day_attack')
+        
+        # Keep the per-draw ordering, then limit to requested number
+        draws = np.concatenate(draws)
+        order = np.argsort(draws * 5 + np.concatenate(slots), kind='stable')[:num_attacks]
         
         # Convert to DataFrame
-        attack_df = pd.DataFrame(attacks[:num_attacks])  # Limit to requested number
+        attack_df = normal_samples.iloc[base_idx[draws[order]]].reset_index(drop=True)
+        attack_df['sensor_value'] = np.concatenate(attack_values)[order]
+        attack_df['attack_type'] = np.concatenate(attack_types)[order]
+        attack_df['is_anomaly'] = 1
         
         print(f"✅ Generated {len(attack_df)} attack samples")
         print(f"🚨 Attack types: {attack_df['attack_type'].value_counts().to_dict()}")
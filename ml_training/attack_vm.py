@@ -4,148 +4,174 @@ Simple VM Attack Script
 Run this from your external VM to attack the main machine
 """
 
-import requests
+import argparse
+import asyncio
+import httpx
+import json
+import numpy as np
 import sys
 import time
-import random
 
-def voltage_sag_attack(target_ip):
-    """Execute voltage sag attack."""
-    print("🚨 Executing Voltage Sag Attack...")
+# orjson parses detector responses several times faster than json
+try:
+    import orjson
     
-    for i in range(10):  # Send 10 attack samples
-        attack_data = {
-            "device_id": "TRANSMISSION_LINE_345KV_001",
-            "sensor_name": "voltage",
-            "sensor_value": 345000 * 0.6 * random.uniform(0.9, 1.1),  # 40% voltage drop
-            "nominal_value": 345000,
-            "device_type": "transmission_line",
-            "voltage_level": "transmission",
-            "sensor_unit": "V",
-            "tolerance_percent": 5.0,
-            "criticality": "critical"
-        }
-        
-        try:
-            response = requests.post(
-                f'http://{target_ip}:8000/api/detect',
-                json=attack_data,
-                timeout=5
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                status = "🚨 DETECTED" if result['isAnomaly'] else "✅ Undetected"
-                print(f"Attack {i+1}: {status} (Score: {result['anomalyScore']:.3f})")
-            else:
-                print(f"Attack {i+1}: Failed - {response.status_code}")
-                
-        except Exception as e:
-            print(f"Attack {i+1}: Error - {e}")
-        
-        time.sleep(2)
-    
-    print("🏁 Voltage Sag Attack completed")
+    parse_json = orjson.loads
+except ImportError:
+    parse_json = json.loads
+
+# Samples per attack, sent to the batch endpoint this many at a time. With the
+# defaults the whole attack is one batch; pacing only comes into play when
+# samples_per_request is below SAMPLES_PER_ATTACK and the attack splits into batches
+SAMPLES_PER_ATTACK = 10
+SAMPLES_PER_REQUEST = 10
+ATTACK_INTERVAL = 2.0  # Default seconds between batch sends; 0 fans every batch out at once
+
+REQUEST_TIMEOUT = 5
+POST_HEADERS = {'Content-Type': 'application/json'}
+
+RNG = np.random.default_rng()
+
+def payload_template(sample):
+    """Serialize the constant fields of a sample once into a bound str.format for sensor_value."""
+    constant_fields = json.dumps(sample, separators=(',', ':'))[1:-1]
+    return ('{{' + constant_fields.replace('{', '{{').replace('}', '}}') + ',"sensor_value":{!r}}}').format
 
-def power_overload_attack(target_ip):
-    """Execute power overload attack."""
-    print("⚡ Executing Power Overload Attack...")
+TRANSMISSION_VOLTAGE_SENSOR = {
+    "device_id": "TRANSMISSION_LINE_345KV_001",
+    "sensor_name": "voltage",
+    "nominal_value": 345000,
+    "device_type": "transmission_line",
+    "voltage_level": "transmission",
+    "sensor_unit": "V",
+    "tolerance_percent": 5.0,
+    "criticality": "critical"
+}
+
+TRANSMISSION_POWER_SENSOR = {
+    "device_id": "TRANSMISSION_LINE_345KV_001",
+    "sensor_name": "active_power",
+    "nominal_value": 400000,
+    "device_type": "transmission_line",
+    "voltage_level": "transmission",
+    "sensor_unit": "kW",
+    "tolerance_percent": 30.0,
+    "criticality": "critical"
+}
+
+# Attack type -> spoofed sensor, sensor_value = nominal * multiplier * uniform(jitter)
+ATTACK_PROFILES = {
+    'voltage_sag': {
+        'name': "Voltage Sag Attack",
+        'icon': "🚨",
+        'format_payload': payload_template(TRANSMISSION_VOLTAGE_SENSOR),
+        'nominal_value': 345000,
+        'multiplier': 0.6,  # 40% voltage drop
+        'jitter': (0.9, 1.1)
+    },
+    'power_overload': {
+        'name': "Power Overload Attack",
+        'icon': "⚡",
+        'format_payload': payload_template(TRANSMISSION_POWER_SENSOR),
+        'nominal_value': 400000,
+        'multiplier': 2.5,  # 250% power overload
+        'jitter': (0.9, 1.1)
+    },
+    'zero_day': {
+        'name': "Zero-Day Attack",
+        'icon': "🎭",
+        'format_payload': payload_template(TRANSMISSION_VOLTAGE_SENSOR),
+        'nominal_value': 345000,
+        'multiplier': 0.3,  # Severe voltage drop
+        'jitter': (0.8, 1.2)
+    }
+}
+
+async def run_attack(name, client, interval=ATTACK_INTERVAL, samples_per_request=SAMPLES_PER_REQUEST):
+    """Execute one attack profile against the detection API."""
+    profile = ATTACK_PROFILES[name]
+    print(f"{profile['icon']} Executing {profile['name']}...")
+    
+    # Every sensor_value of the attack drawn in one vectorized call (as Python floats for repr)
+    base_value = profile['nominal_value'] * profile['multiplier']
+    sensor_values = (base_value * RNG.uniform(*profile['jitter'], SAMPLES_PER_ATTACK)).tolist()
+    format_sample = profile['format_payload']
     
-    for i in range(10):
-        attack_data = {
-            "device_id": "TRANSMISSION_LINE_345KV_001",
-            "sensor_name": "active_power",
-            "sensor_value": 400000 * 2.5 * random.uniform(0.9, 1.1),  # 250% power overload
-            "nominal_value": 400000,
-            "device_type": "transmission_line",
-            "voltage_level": "transmission",
-            "sensor_unit": "kW",
-            "tolerance_percent": 30.0,
-            "criticality": "critical"
-        }
+    async def send_batch(first):
+        batch_values = sensor_values[first:first + samples_per_request]
+        count = len(batch_values)
+        samples = [format_sample(sensor_value) for sensor_value in batch_values]
+        body = ('{"samples":[' + ','.join(samples) + ']}').encode('ascii')
         
         try:
-            response = requests.post(
-                f'http://{target_ip}:8000/api/detect',
-                json=attack_data,
-                timeout=5
-            )
+            response = await client.post('/api/detect/batch', content=body)
             
             if response.status_code == 200:
-                result = response.json()
-                status = "🚨 DETECTED" if result['isAnomaly'] else "✅ Undetected"
-                print(f"Attack {i+1}: {status} (Score: {result['anomalyScore']:.3f})")
+                # One write per batch instead of a print per sample
+                lines = []
+                for i, result in enumerate(parse_json(response.content), first):
+                    status = "🚨 DETECTED" if result['isAnomaly'] else "✅ Undetected"
+                    lines.append(f"Attack {i+1}: {status} (Score: {result['anomalyScore']:.3f})\n")
+                sys.stdout.write(''.join(lines))
+                sys.stdout.flush()
             else:
-                print(f"Attack {i+1}: Failed - {response.status_code}")
+                print(f"Attacks {first+1}-{first+count}: Failed - {response.status_code}")
                 
         except Exception as e:
-            print(f"Attack {i+1}: Error - {e}")
-        
-        time.sleep(2)
+            print(f"Attacks {first+1}-{first+count}: Error - {e}")
+    
+    await send_paced(send_batch, interval, samples_per_request)
     
-    print("🏁 Power Overload Attack completed")
+    print(f"🏁 {profile['name']} completed")
 
-def zero_day_attack(target_ip):
-    """Execute zero-day attack."""
-    print("🎭 Executing Zero-Day Attack...")
+async def send_paced(send_batch, interval, samples_per_request):
+    """Send the attack's batches at a fixed rate without waiting on each response.
     
-    for i in range(10):
-        attack_data = {
-            "device_id": "TRANSMISSION_LINE_345KV_001",
-            "sensor_name": "voltage",
-            "sensor_value": 345000 * 0.3 * random.uniform(0.8, 1.2),  # Severe voltage drop
-            "nominal_value": 345000,
-            "device_type": "transmission_line",
-            "voltage_level": "transmission",
-            "sensor_unit": "V",
-            "tolerance_percent": 5.0,
-            "criticality": "critical"
-        }
-        
-        try:
-            response = requests.post(
-                f'http://{target_ip}:8000/api/detect',
-                json=attack_data,
-                timeout=5
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                status = "🚨 DETECTED" if result['isAnomaly'] else "✅ Undetected"
-                print(f"Attack {i+1}: {status} (Score: {result['anomalyScore']:.3f})")
-            else:
-                print(f"Attack {i+1}: Failed - {response.status_code}")
-                
-        except Exception as e:
-            print(f"Attack {i+1}: Error - {e}")
+    The first batch goes out immediately, so a single-batch attack is never delayed.
+    """
+    tasks = []
+    deadline = time.monotonic()
+    for first in range(0, SAMPLES_PER_ATTACK, samples_per_request):
+        # Sleep to the next tick, so time spent sending is absorbed rather than added
+        remaining = deadline - time.monotonic()
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+        deadline += interval
         
-        time.sleep(2)
+        tasks.append(asyncio.create_task(send_batch(first)))
     
-    print("🏁 Zero-Day Attack completed")
+    await asyncio.gather(*tasks)
 
-def main():
-    if len(sys.argv) < 3:
-        print("Usage: python attack_vm.py <attack_type> <target_ip>")
-        print("Attack types: voltage_sag, power_overload, zero_day")
-        print("Example: python attack_vm.py voltage_sag 192.168.1.100")
-        return
+async def main():
+    parser = argparse.ArgumentParser(
+        description='Send spoofed sensor readings to the detection API',
+        epilog='Example: python attack_vm.py voltage_sag 192.168.1.100 0.5 --per-request 2'
+    )
+    parser.add_argument('attack_type', choices=ATTACK_PROFILES, help='Attack profile to run')
+    parser.add_argument('target_ip', help='Detection server address')
+    parser.add_argument('interval', nargs='?', type=float, default=ATTACK_INTERVAL,
+                        help='Seconds between batch sends; 0 sends every batch concurrently')
+    parser.add_argument('--per-request', type=int, default=SAMPLES_PER_REQUEST,
+                        help=f'Samples per /api/detect/batch request (default: {SAMPLES_PER_REQUEST}); '
+                             f'below {SAMPLES_PER_ATTACK} the attack is split into paced batches')
+    args = parser.parse_args()
     
-    attack_type = sys.argv[1]
-    target_ip = sys.argv[2]
+    if not 1 <= args.per_request <= SAMPLES_PER_ATTACK:
+        parser.error(f'--per-request must be between 1 and {SAMPLES_PER_ATTACK}')
     
-    print(f"🎯 Target: {target_ip}:8000")
-    print(f"⚔️ Attack: {attack_type}")
+    print(f"🎯 Target: {args.target_ip}:8000")
+    print(f"⚔️ Attack: {args.attack_type}")
     print("-" * 40)
     
-    if attack_type == "voltage_sag":
-        voltage_sag_attack(target_ip)
-    elif attack_type == "power_overload":
-        power_overload_attack(target_ip)
-    elif attack_type == "zero_day":
-        zero_day_attack(target_ip)
-    else:
-        print(f"❌ Unknown attack type: {attack_type}")
-        print("Available: voltage_sag, power_overload, zero_day")
+    # One pooled client per run: every attack sample reuses its keep-alive connections.
+    # Target, headers and timeout are fixed on the client, and trust_env=False skips
+    # proxy/SSL environment lookups, so each POST carries only its body.
+    limits = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+    async with httpx.AsyncClient(
+        base_url=f'http://{args.target_ip}:8000', headers=POST_HEADERS, timeout=REQUEST_TIMEOUT,
+        limits=limits, trust_env=False
+    ) as client:
+        await run_attack(args.attack_type, client, args.interval, args.per_request)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
@@ -1,11 +1,132 @@
 import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
-import random
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 import json
+import os
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor
+
+# Datasets are written as Parquet when pyarrow is installed, CSV otherwise
+PYARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+# Numba compiles the per-sample series math to parallel native code; NumPy arrays otherwise
+try:
+    from numba import njit, prange
+    
+    @njit(cache=True, parallel=True, fastmath=True)
+    def _compute_sensor_series(hour_factor, day_factor, seasonal_factor, correlation, noise, drift_noise,
+                               baseline, amplitude, noise_level, drift_rate, range_min, range_max):
+        """Clipped reading per sample: pattern + noise + drift + correlation."""
+        out = np.empty(hour_factor.shape[0])
+        for i in prange(hour_factor.shape[0]):
+            value = (
+                baseline +
+                amplitude * hour_factor[i] * 0.5 +
+                amplitude * day_factor[i] * 0.3 +
+                amplitude * seasonal_factor[i] * 0.2 +
+                noise_level * noise[i] +
+                drift_rate * i * (0.1 * drift_noise[i]) +
+                correlation[i]
+            )
+            out[i] = min(max(value, range_min), range_max)
+        return out
+    
+    @njit(cache=True, parallel=True, error_model='numpy')
+    def _compute_derived_features(values, group_starts, out):
+        """Fill every derived feature column in one sweep over each group's contiguous values."""
+        for g in prange(group_starts.shape[0] - 1):
+            start = group_starts[g]
+            end = group_starts[g + 1]
+            
+            # Group mean and sample std for the z-score
+            total = 0.0
+            for k in range(start, end):
+                total += values[k]
+            mean = total / (end - start)
+            squares = 0.0
+            for k in range(start, end):
+                squares += (values[k] - mean) ** 2
+            std = np.sqrt(squares / (end - start - 1))
+            
+            for k in range(start, end):
+                # Rolling mean/std over up to `window` trailing values (min_periods=1)
+                for w, window in enumerate((5, 10, 30)):
+                    first = max(start, k - window + 1)
+                    count = k - first + 1
+                    window_total = 0.0
+                    for j in range(first, k + 1):
+                        window_total += values[j]
+                    window_mean = window_total / count
+                    window_squares = 0.0
+                    for j in range(first, k + 1):
+                        window_squares += (values[j] - window_mean) ** 2
+                    out[k, 2 * w] = window_mean
+                    out[k, 2 * w + 1] = np.sqrt(window_squares / (count - 1)) if count > 1 else 0.0
+                
+                # Lags stay NaN until the group has enough history
+                for l, lag in enumerate((1, 5, 10)):
+                    out[k, 6 + l] = values[k - lag] if k - lag >= start else np.nan
+                
+                # Rate of change, with division by zero mapped to 0
+                rate = values[k] / values[k - 1] - 1.0 if k > start else np.nan
+                out[k, 9] = 0.0 if np.isinf(rate) else rate
+                
+                out[k, 10] = (values[k] - mean) / (std + 1e-8)
+    
+    NUMBA_AVAILABLE = True
+except ImportError:
+    def _compute_sensor_series(hour_factor, day_factor, seasonal_factor, correlation, noise, drift_noise,
+                               baseline, amplitude, noise_level, drift_rate, range_min, range_max):
+        """Clipped reading per sample: pattern + noise + drift + correlation."""
+        sample_index = np.arange(hour_factor.shape[0])
+        value = (
+            baseline +
+            amplitude * hour_factor * 0.5 +
+            amplitude * day_factor * 0.3 +
+            amplitude * seasonal_factor * 0.2 +
+            noise_level * noise +
+            drift_rate * sample_index * (0.1 * drift_noise) +
+            correlation
+        )
+        return np.clip(value, range_min, range_max)
+    
+    NUMBA_AVAILABLE = False
+
+
+# Low-cardinality string columns stored as categoricals (integer codes + small lookup)
+CATEGORICAL_COLUMNS = ['facility_type', 'device_id', 'device_type', 'sensor_name',
+                       'sensor_unit', 'criticality', 'anomaly_type']
+
+# Cross-sensor correlation rules based on industrial physics (symmetric; each sensor is
+# pulled by the deviation of correlated sensors generated before it on the same device)
+SENSOR_CORRELATIONS = {
+    ('temperature', 'pressure'): 0.3,
+    ('temperature', 'flow_rate'): -0.2,
+    ('pressure', 'flow_rate'): 0.4,
+    ('vibration', 'temperature'): 0.2,
+    ('power_output', 'temperature'): 0.5,
+    ('voltage', 'current'): 0.6,
+    ('frequency', 'voltage'): 0.3
+}
+
+# Per-sensor time-series features, in the column order _add_derived_features adds them.
+# These and sensor_value are stored as float32; the kernels accumulate in float64
+DERIVED_FEATURE_COLUMNS = ['rolling_mean_5', 'rolling_std_5', 'rolling_mean_10', 'rolling_std_10',
+                           'rolling_mean_30', 'rolling_std_30', 'lag_1', 'lag_5', 'lag_10',
+                           'rate_of_change', 'z_score']
+
+# Daily, weekly and yearly cycles as lookup tables indexed by hour (0-23), weekday (0-6)
+# and day of year (1-366), so readings gather precomputed values instead of calling sin
+HOUR_SIN = np.sin(2 * np.pi * np.arange(24) / 24)
+DOW_SIN = np.sin(2 * np.pi * np.arange(7) / 7)
+DOY_SIN = np.sin(2 * np.pi * np.arange(367) / 365)
+
+# Below this many samples devices are generated in-process; the pool's startup costs more
+PARALLEL_MIN_SAMPLES = 5000
 
 
 class FacilityType(Enum):
@@ -40,6 +161,31 @@ class DeviceConfig:
     sensors: List[SensorConfig]
     facility: FacilityType
     criticality: str = "medium"
+    sensor_by_name: Dict[str, SensorConfig] = field(init=False, repr=False)
+    range_min: np.ndarray = field(init=False, repr=False)
+    range_max: np.ndarray = field(init=False, repr=False)
+    correlations: np.ndarray = field(init=False, repr=False)
+    
+    def __post_init__(self):
+        # O(1) sensor lookup by name, plus ranges aligned with `sensors` for array-wide clipping
+        self.sensor_by_name = {sensor.name: sensor for sensor in self.sensors}
+        self.range_min = np.array([sensor.range_min for sensor in self.sensors])
+        self.range_max = np.array([sensor.range_max for sensor in self.sensors])
+        
+        # correlations[i, j]: pull of earlier sensor j on sensor i (strictly lower triangular)
+        self.correlations = np.zeros((len(self.sensors), len(self.sensors)))
+        for i, current in enumerate(self.sensors):
+            for j, other in enumerate(self.sensors[:i]):
+                self.correlations[i, j] = (
+                    SENSOR_CORRELATIONS.get((current.name, other.name), 0.0) +
+                    SENSOR_CORRELATIONS.get((other.name, current.name), 0.0)
+                )
+
+
+def _generate_device_job(job: Tuple['IndustrialDataFabricator', dict, int]) -> Dict[str, np.ndarray]:
+    """Process pool worker: generate one device's columns from its own seeded generator."""
+    fabricator, device_kwargs, seed = job
+    return fabricator._generate_device_data(rng=np.random.default_rng(seed), **device_kwargs)
 
 
 class IndustrialDataFabricator:
@@ -49,13 +195,17 @@ class IndustrialDataFabricator:
     """
     
     def __init__(self, random_seed: int = 42):
-        np.random.seed(random_seed)
-        random.seed(random_seed)
+        # Explicit generator: bulk draws, and no reseeding of the global NumPy/random state
+        self.rng = np.random.default_rng(random_seed)
         
         self.sensor_configs = self._initialize_sensor_configs()
         self.facility_configs = self._initialize_facility_configs()
         self.anomaly_generators = self._initialize_anomaly_generators()
         
+        # Anomaly types in code order: drawn as integer codes, labelled by value
+        self.anomaly_types = list(AnomalyType)
+        self.anomaly_labels = [anomaly_type.value for anomaly_type in self.anomaly_types]
+        
     def _initialize_sensor_configs(self) -> Dict[str, SensorConfig]:
         """Initialize sensor configurations with realistic industrial parameters."""
         return {
@@ -337,28 +487,49 @@ class IndustrialDataFabricator:
         print(f"📊 Anomaly rate: {anomaly_rate*100:.1f}%")
         print(f"⏰ Time range: {start_date} to {start_date + timedelta(seconds=samples*sample_interval_seconds)}")
         
-        all_data = []
-        anomaly_indices = set(np.random.choice(samples, int(samples * anomaly_rate), replace=False))
+        anomaly_mask = np.zeros(samples, dtype=bool)
+        anomaly_mask[self.rng.choice(samples, int(samples * anomaly_rate), replace=False)] = True
         
-        # Generate base time series
-        timestamps = [start_date + timedelta(seconds=i * sample_interval_seconds) for i in range(samples)]
+        # Generate base time series, with its calendar fields derived once for every device
+        timestamps = pd.date_range(start_date, periods=samples, freq=f'{sample_interval_seconds}s')
+        hours = timestamps.hour.to_numpy()
+        dows = timestamps.weekday.to_numpy()
+        doys = timestamps.dayofyear.to_numpy()
         
+        # Devices are independent: each gets its own generator, seeded from the fabricator's,
+        # so the dataset is the same whether they run in-process or across a process pool
+        jobs = []
         for facility_type in facility_types:
-            devices = self.facility_configs[facility_type]
-            
-            for device in devices:
+            for device in self.facility_configs[facility_type]:
                 print(f"  📟 Generating data for {device.device_id} ({facility_type.value})...")
                 
-                device_data = self._generate_device_data(
+                device_kwargs = dict(
                     device=device,
                     timestamps=timestamps,
-                    anomaly_indices=anomaly_indices
+                    hours=hours,
+                    dows=dows,
+                    doys=doys,
+                    anomaly_mask=anomaly_mask
                 )
-                
-                all_data.extend(device_data)
-        
-        # Convert to DataFrame
-        df = pd.DataFrame(all_data)
+                jobs.append((self, device_kwargs, int(self.rng.integers(2**63))))
+        
+        if samples < PARALLEL_MIN_SAMPLES or len(jobs) < 2:
+            all_data = [_generate_device_job(job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 1)) as executor:
+                all_data = list(executor.map(_generate_device_job, jobs))
+        
+        # Convert to DataFrame: concatenate each column across devices and build the frame once.
+        # Label columns arrive as per-device categoricals and are merged on their codes, with
+        # sorted categories so sorting by them stays alphabetical
+        df = pd.DataFrame({
+            column: (
+                union_categoricals([device_data[column] for device_data in all_data], sort_categories=True)
+                if column in CATEGORICAL_COLUMNS else
+                np.concatenate([device_data[column] for device_data in all_data])
+            )
+            for column in all_data[0]
+        })
         
         # Add derived features
         df = self._add_derived_features(df)
@@ -372,277 +543,222 @@ class IndustrialDataFabricator:
     def _generate_device_data(
         self,
         device: DeviceConfig,
-        timestamps: List[datetime],
-        anomaly_indices: set
-    ) -> List[Dict]:
-        """Generate sensor data for a specific device."""
-        device_data = []
-        
-        # Initialize sensor baselines
-        sensor_baselines = {}
-        for sensor in device.sensors:
-            sensor_baselines[sensor.name] = np.random.uniform(
-                sensor.range_min + (sensor.range_max - sensor.range_min) * 0.2,
-                sensor.range_min + (sensor.range_max - sensor.range_min) * 0.8
-            )
+        timestamps: pd.DatetimeIndex,
+        hours: np.ndarray,
+        dows: np.ndarray,
+        doys: np.ndarray,
+        anomaly_mask: np.ndarray,
+        rng: np.random.Generator
+    ) -> Dict[str, np.ndarray]:
+        """Generate sensor data for a specific device as one array (or categorical) per column."""
+        samples = len(timestamps)
+        sensor_names = [sensor.name for sensor in device.sensors]
+        num_sensors = len(sensor_names)
+        
+        # Initialize sensor baselines, one draw per sensor in device order
+        sensor_span = device.range_max - device.range_min
+        sensor_baselines = rng.uniform(device.range_min + sensor_span * 0.2, device.range_min + sensor_span * 0.8)
+        
+        # Generate normal readings for all samples at once, as a samples x sensors matrix
+        # with columns in device sensor order
+        values = self._generate_normal_readings(
+            device=device,
+            hours=hours,
+            dows=dows,
+            doys=doys,
+            baselines=sensor_baselines,
+            rng=rng
+        )
         
-        for i, timestamp in enumerate(timestamps):
-            # Generate normal readings
-            readings = self._generate_normal_readings(
-                device=device,
-                timestamp=timestamp,
-                baselines=sensor_baselines,
-                sample_index=i
-            )
-            
-            # Apply anomalies if this sample is marked as anomalous
-            is_anomaly = i in anomaly_indices
-            anomaly_type = None
-            
-            if is_anomaly:
-                anomaly_type = np.random.choice(list(AnomalyType))
-                readings = self._apply_anomaly(readings, anomaly_type, device)
-            
-            # Create data record
-            for sensor_name, value in readings.items():
-                sensor_config = next(s for s in device.sensors if s.name == sensor_name)
-                
-                record = {
-                    'timestamp': timestamp,
-                    'facility_type': device.facility.value,
-                    'device_id': device.device_id,
-                    'device_type': device.device_type,
-                    'sensor_name': sensor_name,
-                    'sensor_value': value,
-                    'sensor_unit': sensor_config.unit,
-                    'criticality': device.criticality,
-                    'is_anomaly': 1 if is_anomaly else 0,
-                    'anomaly_type': anomaly_type.value if anomaly_type else None,
-                    'hour_of_day': timestamp.hour,
-                    'day_of_week': timestamp.weekday(),
-                    'day_of_year': timestamp.timetuple().tm_yday
-                }
-                
-                device_data.append(record)
+        # Apply anomalies to the samples marked as anomalous, one bulk pass per anomaly type
+        anomaly_rows = np.flatnonzero(anomaly_mask)
+        anomaly_type_idx = rng.integers(0, len(self.anomaly_types), size=len(anomaly_rows))
+        self._apply_anomalies(values, anomaly_rows, anomaly_type_idx, device, rng)
         
-        return device_data
+        is_anomaly = anomaly_mask.astype(np.int64)
+        anomaly_codes = np.full(samples, -1, dtype=np.int8)  # -1 = no anomaly (NaN label)
+        anomaly_codes[anomaly_rows] = anomaly_type_idx
+        
+        # One row per (timestamp, sensor), sensors in device order. Label columns are
+        # categoricals built from integer codes, never per-row Python strings
+        rows = samples * num_sensors
+        constant_codes = np.zeros(rows, dtype=np.int8)
+        units, unit_codes = np.unique([sensor.unit for sensor in device.sensors], return_inverse=True)
+        return {
+            'timestamp': np.repeat(timestamps.to_numpy(), num_sensors),
+            'facility_type': pd.Categorical.from_codes(constant_codes, [device.facility.value]),
+            'device_id': pd.Categorical.from_codes(constant_codes, [device.device_id]),
+            'device_type': pd.Categorical.from_codes(constant_codes, [device.device_type]),
+            'sensor_name': pd.Categorical.from_codes(np.tile(np.arange(num_sensors), samples), sensor_names),
+            'sensor_value': values.ravel().astype(np.float32),
+            'sensor_unit': pd.Categorical.from_codes(np.tile(unit_codes, samples), units),
+            'criticality': pd.Categorical.from_codes(constant_codes, [device.criticality]),
+            'is_anomaly': np.repeat(is_anomaly, num_sensors),
+            'anomaly_type': pd.Categorical.from_codes(
+                np.repeat(anomaly_codes, num_sensors), self.anomaly_labels
+            ),
+            'hour_of_day': np.repeat(hours, num_sensors),
+            'day_of_week': np.repeat(dows, num_sensors),
+            'day_of_year': np.repeat(doys, num_sensors)
+        }
     
     def _generate_normal_readings(
         self,
         device: DeviceConfig,
-        timestamp: datetime,
-        baselines: Dict[str, float],
-        sample_index: int
-    ) -> Dict[str, float]:
-        """Generate normal sensor readings with realistic patterns."""
-        readings = {}
-        
-        for sensor in device.sensors:
-            baseline = baselines[sensor.name]
-            
-            # Time-based patterns
-            hour_factor = np.sin(2 * np.pi * timestamp.hour / 24)
-            day_factor = np.sin(2 * np.pi * timestamp.weekday() / 7)
-            seasonal_factor = np.sin(2 * np.pi * timestamp.timetuple().tm_yday / 365)
+        hours: np.ndarray,
+        dows: np.ndarray,
+        doys: np.ndarray,
+        baselines: np.ndarray,
+        rng: np.random.Generator
+    ) -> np.ndarray:
+        """Generate normal sensor readings with realistic patterns, one column per sensor."""
+        samples = len(hours)
+        
+        # Readings and each sensor's relative deviation from its baseline, preallocated
+        # and filled column by column in sensor order
+        readings = np.empty((samples, len(device.sensors)))
+        deviations = np.empty_like(readings)
+        
+        # Time-based patterns
+        hour_factor = HOUR_SIN[hours]
+        day_factor = DOW_SIN[dows]
+        seasonal_factor = DOY_SIN[doys]
+        
+        for i, sensor in enumerate(device.sensors):
+            baseline = baselines[i]
             
-            # Combine patterns
-            pattern_value = (
-                baseline +
-                sensor.seasonal_amplitude * hour_factor * 0.5 +
-                sensor.seasonal_amplitude * day_factor * 0.3 +
-                sensor.seasonal_amplitude * seasonal_factor * 0.2
-            )
-            
-            # Add realistic noise
-            noise = np.random.normal(0, sensor.noise_level)
+            # Standard normal draws for realistic noise and gradual drift, scaled in the kernel
+            noise = rng.standard_normal(samples)
+            drift_noise = rng.standard_normal(samples)
             
-            # Add gradual drift
-            drift = sensor.drift_rate * sample_index * np.random.normal(0, 0.1)
+            # Apply cross-sensor correlations: one matrix-vector product over all samples
+            correlation_factor = deviations[:, :i] @ device.correlations[i, :i] * baseline * 0.1
             
-            # Apply cross-sensor correlations
-            correlation_factor = self._apply_cross_sensor_correlations(
-                device, sensor.name, readings, baselines
+            # Pattern + noise + drift + correlation, clipped to the sensor range
+            final_value = _compute_sensor_series(
+                hour_factor, day_factor, seasonal_factor, correlation_factor, noise, drift_noise,
+                baseline, sensor.seasonal_amplitude, sensor.noise_level,
+                sensor.drift_rate, sensor.range_min, sensor.range_max
             )
             
-            final_value = pattern_value + noise + drift + correlation_factor
-            
-            # Ensure value is within sensor range
-            final_value = np.clip(final_value, sensor.range_min, sensor.range_max)
-            
-            readings[sensor.name] = round(final_value, 3)
+            np.round(final_value, 3, out=readings[:, i])
+            deviations[:, i] = (readings[:, i] - baseline) / baseline
         
         return readings
     
-    def _apply_cross_sensor_correlations(
+    def _apply_anomalies(
         self,
+        values: np.ndarray,
+        anomaly_rows: np.ndarray,
+        anomaly_type_idx: np.ndarray,
         device: DeviceConfig,
-        current_sensor: str,
-        existing_readings: Dict[str, float],
-        baselines: Dict[str, float]
-    ) -> float:
-        """Apply realistic cross-sensor correlations."""
-        correlation_factor = 0.0
-        
-        # Define correlation rules based on industrial physics
-        correlations = {
-            ('temperature', 'pressure'): 0.3,
-            ('temperature', 'flow_rate'): -0.2,
-            ('pressure', 'flow_rate'): 0.4,
-            ('vibration', 'temperature'): 0.2,
-            ('power_output', 'temperature'): 0.5,
-            ('voltage', 'current'): 0.6,
-            ('frequency', 'voltage'): 0.3
-        }
-        
-        for (sensor1, sensor2), correlation in correlations.items():
-            if current_sensor == sensor1 and sensor2 in existing_readings:
-                other_value = existing_readings[sensor2]
-                other_baseline = baselines[sensor2]
-                deviation = (other_value - other_baseline) / other_baseline
-                correlation_factor += correlation * deviation * baselines[current_sensor] * 0.1
-            elif current_sensor == sensor2 and sensor1 in existing_readings:
-                other_value = existing_readings[sensor1]
-                other_baseline = baselines[sensor1]
-                deviation = (other_value - other_baseline) / other_baseline
-                correlation_factor += correlation * deviation * baselines[current_sensor] * 0.1
-        
-        return correlation_factor
-    
-    def _apply_anomaly(
-        self,
-        readings: Dict[str, float],
-        anomaly_type: AnomalyType,
-        device: DeviceConfig
-    ) -> Dict[str, float]:
-        """Apply specific anomaly type to sensor readings."""
-        anomaly_generator = self.anomaly_generators[anomaly_type]
-        return anomaly_generator(readings, device)
+        rng: np.random.Generator
+    ) -> None:
+        """Apply each anomaly type, in place, to the rows drawn for it."""
+        for type_idx, anomaly_type in enumerate(self.anomaly_types):
+            rows = anomaly_rows[anomaly_type_idx == type_idx]
+            if len(rows):
+                anomaly_generator = self.anomaly_generators[anomaly_type]
+                anomaly_generator(values, rows, device, rng)
     
-    def _generate_sensor_drift(self, readings: Dict[str, float], device: DeviceConfig) -> Dict[str, float]:
+    def _generate_sensor_drift(
+        self, values: np.ndarray, rows: np.ndarray, device: DeviceConfig, rng: np.random.Generator
+    ) -> None:
         """Generate gradual sensor drift anomaly."""
-        modified_readings = readings.copy()
-        
-        # Select random sensor to drift
-        sensor_name = random.choice(list(readings.keys()))
-        sensor_config = next(s for s in device.sensors if s.name == sensor_name)
+        # Select random sensor to drift in each row
+        sensors = rng.integers(0, values.shape[1], size=len(rows))
+        range_min = device.range_min[sensors]
+        range_max = device.range_max[sensors]
         
         # Apply gradual drift (5-20% of range)
-        drift_amount = np.random.uniform(0.05, 0.2) * (sensor_config.range_max - sensor_config.range_min)
-        drift_direction = random.choice([-1, 1])
-        
-        modified_readings[sensor_name] += drift_direction * drift_amount
-        modified_readings[sensor_name] = np.clip(
-            modified_readings[sensor_name],
-            sensor_config.range_min,
-            sensor_config.range_max
-        )
+        drift_amount = rng.uniform(0.05, 0.2, size=len(rows)) * (range_max - range_min)
+        drift_direction = rng.choice([-1, 1], size=len(rows))
         
-        return modified_readings
+        values[rows, sensors] = np.clip(values[rows, sensors] + drift_direction * drift_amount, range_min, range_max)
     
-    def _generate_spike_anomaly(self, readings: Dict[str, float], device: DeviceConfig) -> Dict[str, float]:
+    def _generate_spike_anomaly(
+        self, values: np.ndarray, rows: np.ndarray, device: DeviceConfig, rng: np.random.Generator
+    ) -> None:
         """Generate sudden spike anomaly."""
-        modified_readings = readings.copy()
-        
-        # Select random sensor for spike
-        sensor_name = random.choice(list(readings.keys()))
-        sensor_config = next(s for s in device.sensors if s.name == sensor_name)
+        # Select random sensor for spike in each row
+        sensors = rng.integers(0, values.shape[1], size=len(rows))
         
         # Generate spike (50-200% of normal value)
-        spike_multiplier = np.random.uniform(1.5, 3.0)
+        spike_multiplier = rng.uniform(1.5, 3.0, size=len(rows))
         
-        modified_readings[sensor_name] *= spike_multiplier
-        modified_readings[sensor_name] = np.clip(
-            modified_readings[sensor_name],
-            sensor_config.range_min,
-            sensor_config.range_max
+        values[rows, sensors] = np.clip(
+            values[rows, sensors] * spike_multiplier,
+            device.range_min[sensors],
+            device.range_max[sensors]
         )
-        
-        return modified_readings
     
-    def _generate_sensor_failure(self, readings: Dict[str, float], device: DeviceConfig) -> Dict[str, float]:
+    def _generate_sensor_failure(
+        self, values: np.ndarray, rows: np.ndarray, device: DeviceConfig, rng: np.random.Generator
+    ) -> None:
         """Generate sensor failure anomaly (stuck or dead sensor)."""
-        modified_readings = readings.copy()
-        
-        # Select random sensor to fail
-        sensor_name = random.choice(list(readings.keys()))
-        sensor_config = next(s for s in device.sensors if s.name == sensor_name)
-        
-        failure_type = random.choice(['stuck', 'dead', 'out_of_range'])
-        
-        if failure_type == 'stuck':
-            # Sensor stuck at previous value (simulate with random constant)
-            modified_readings[sensor_name] = np.random.uniform(
-                sensor_config.range_min,
-                sensor_config.range_max
-            )
-        elif failure_type == 'dead':
-            # Sensor reading zero or minimum
-            modified_readings[sensor_name] = sensor_config.range_min
-        else:  # out_of_range
+        # Select random sensor to fail in each row
+        sensors = rng.integers(0, values.shape[1], size=len(rows))
+        range_min = device.range_min[sensors]
+        range_max = device.range_max[sensors]
+        
+        # 0 = stuck, 1 = dead, 2 = out_of_range
+        failure_type = rng.integers(0, 3, size=len(rows))
+        
+        values[rows, sensors] = np.select(
+            [failure_type == 0, failure_type == 1],
+            [
+                # Sensor stuck at previous value (simulate with random constant)
+                rng.uniform(range_min, range_max),
+                # Sensor reading zero or minimum
+                range_min
+            ],
             # Sensor reading beyond normal range
-            if random.choice([True, False]):
-                modified_readings[sensor_name] = sensor_config.range_max * 1.1
-            else:
-                modified_readings[sensor_name] = sensor_config.range_min * 0.9
-        
-        return modified_readings
+            np.where(rng.random(len(rows)) < 0.5, range_max * 1.1, range_min * 0.9)
+        )
     
-    def _generate_process_anomaly(self, readings: Dict[str, float], device: DeviceConfig) -> Dict[str, float]:
+    def _generate_process_anomaly(
+        self, values: np.ndarray, rows: np.ndarray, device: DeviceConfig, rng: np.random.Generator
+    ) -> None:
         """Generate process-level anomaly affecting multiple sensors."""
-        modified_readings = readings.copy()
-        
-        # Affect multiple correlated sensors
-        affected_sensors = random.sample(list(readings.keys()), min(3, len(readings)))
+        # Affect multiple correlated sensors: up to 3 distinct sensors per row
+        num_affected = min(3, values.shape[1])
+        sensors = np.argsort(rng.random((len(rows), values.shape[1])), axis=1)[:, :num_affected]
         
         # Apply coordinated changes (simulate process upset)
-        upset_factor = np.random.uniform(0.8, 1.3)
-        
-        for sensor_name in affected_sensors:
-            sensor_config = next(s for s in device.sensors if s.name == sensor_name)
-            
-            modified_readings[sensor_name] *= upset_factor
-            modified_readings[sensor_name] = np.clip(
-                modified_readings[sensor_name],
-                sensor_config.range_min,
-                sensor_config.range_max
-            )
+        upset_factor = rng.uniform(0.8, 1.3, size=(len(rows), 1))
         
-        return modified_readings
+        rows = rows[:, None]
+        values[rows, sensors] = np.clip(
+            values[rows, sensors] * upset_factor,
+            device.range_min[sensors],
+            device.range_max[sensors]
+        )
     
-    def _generate_cyber_attack(self, readings: Dict[str, float], device: DeviceConfig) -> Dict[str, float]:
+    def _generate_cyber_attack(
+        self, values: np.ndarray, rows: np.ndarray, device: DeviceConfig, rng: np.random.Generator
+    ) -> None:
         """Generate cyber attack anomaly (malicious data manipulation)."""
-        modified_readings = readings.copy()
-        
-        attack_type = random.choice(['data_injection', 'replay_attack', 'man_in_middle'])
-        
-        if attack_type == 'data_injection':
-            # Inject false readings
-            for sensor_name in readings.keys():
-                if random.random() < 0.3:  # 30% chance per sensor
-                    sensor_config = next(s for s in device.sensors if s.name == sensor_name)
-                    # Inject random value within range
-                    modified_readings[sensor_name] = np.random.uniform(
-                        sensor_config.range_min,
-                        sensor_config.range_max
-                    )
-        
-        elif attack_type == 'replay_attack':
-            # Replay old values (simulate with slight variations)
-            for sensor_name in readings.keys():
-                if random.random() < 0.5:  # 50% chance per sensor
-                    # Add small random variation to simulate replay
-                    variation = np.random.normal(0, readings[sensor_name] * 0.01)
-                    modified_readings[sensor_name] += variation
-        
-        else:  # man_in_middle
-            # Subtle manipulation to hide attack
-            for sensor_name in readings.keys():
-                if random.random() < 0.4:  # 40% chance per sensor
-                    # Small but consistent bias
-                    bias = readings[sensor_name] * np.random.uniform(-0.05, 0.05)
-                    modified_readings[sensor_name] += bias
-        
-        return modified_readings
+        readings = values[rows]
+        shape = readings.shape
+        
+        # 0 = data_injection, 1 = replay_attack, 2 = man_in_middle, each hitting sensors
+        # independently with a 30% / 50% / 40% chance
+        attack_type = rng.integers(0, 3, size=(len(rows), 1))
+        hit = rng.random(shape) < np.array([0.3, 0.5, 0.4])[attack_type]
+        
+        modified_readings = np.select(
+            [attack_type == 0, attack_type == 1],
+            [
+                # Inject random value within range
+                rng.uniform(device.range_min, device.range_max, size=shape),
+                # Replay old values (simulate with slight variations)
+                readings + readings * 0.01 * rng.standard_normal(shape)
+            ],
+            # Subtle manipulation to hide attack: small but consistent bias
+            readings + readings * rng.uniform(-0.05, 0.05, size=shape)
+        )
+        
+        values[rows] = np.where(hit, modified_readings, readings)
     
     def _add_derived_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Add derived features for enhanced ML training."""
@@ -651,44 +767,82 @@ class IndustrialDataFabricator:
         # Sort by timestamp and device for proper time-series features
         df = df.sort_values(['facility_type', 'device_id', 'sensor_name', 'timestamp'])
         
+        if NUMBA_AVAILABLE:
+            # Fused kernel: gather each (device, sensor) group contiguously, compute every
+            # derived column in one pass, then scatter the rows back to frame order
+            codes = df.groupby(['device_id', 'sensor_name'], observed=True, sort=False).ngroup().to_numpy()
+            order = np.argsort(codes, kind='stable')
+            group_starts = np.searchsorted(codes[order], np.arange(codes.max() + 2))
+            
+            grouped = np.empty((len(df), len(DERIVED_FEATURE_COLUMNS)), dtype=np.float32)
+            _compute_derived_features(df['sensor_value'].to_numpy()[order], group_starts, grouped)
+            
+            derived = np.empty_like(grouped)
+            derived[order] = grouped
+            df[DERIVED_FEATURE_COLUMNS] = derived
+        else:
+            df = self._add_grouped_features(df)
+            df[DERIVED_FEATURE_COLUMNS] = df[DERIVED_FEATURE_COLUMNS].astype(np.float32)
+        
+        # Fill NaN values in a single backward/forward pass. Infinite values never reach
+        # this point: rate_of_change maps them to 0 where it is computed
+        df = df.bfill().ffill()
+        
+        # If still NaN, fill numeric columns with 0 (0 is not a category of the label columns)
+        numeric_columns = df.select_dtypes('number').columns
+        df[numeric_columns] = df[numeric_columns].fillna(0)
+        
+        return df
+    
+    def _add_grouped_features(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Add derived features with pandas groupby passes (used when Numba is unavailable)."""
+        # Group once and reuse it for every feature below
+        sensor_values = df.groupby(['device_id', 'sensor_name'], observed=True, sort=False)['sensor_value']
+        
         # Add rolling statistics (per sensor)
         for window in [5, 10, 30]:
-            df[f'rolling_mean_{window}'] = df.groupby(['device_id', 'sensor_name'])['sensor_value'].transform(
+            df[f'rolling_mean_{window}'] = sensor_values.transform(
                 lambda x: x.rolling(window=window, min_periods=1).mean()
             )
-            df[f'rolling_std_{window}'] = df.groupby(['device_id', 'sensor_name'])['sensor_value'].transform(
+            df[f'rolling_std_{window}'] = sensor_values.transform(
                 lambda x: x.rolling(window=window, min_periods=1).std().fillna(0)
             )
         
         # Add lag features
         for lag in [1, 5, 10]:
-            df[f'lag_{lag}'] = df.groupby(['device_id', 'sensor_name'])['sensor_value'].shift(lag)
+            df[f'lag_{lag}'] = sensor_values.shift(lag)
         
         # Add rate of change (handle division by zero)
-        df['rate_of_change'] = df.groupby(['device_id', 'sensor_name'])['sensor_value'].pct_change()
+        df['rate_of_change'] = sensor_values.pct_change()
         df['rate_of_change'] = df['rate_of_change'].replace([np.inf, -np.inf], 0)
         
-        # Add z-score (standardized value, handle division by zero)
-        df['z_score'] = df.groupby(['device_id', 'sensor_name'])['sensor_value'].transform(
-            lambda x: (x - x.mean()) / (x.std() + 1e-8)  # Add small epsilon to prevent division by zero
+        # Add z-score (standardized value, handle division by zero) from the built-in group
+        # mean/std, broadcast back to the rows without a Python call per group
+        df['z_score'] = (df['sensor_value'] - sensor_values.transform('mean')) / (
+            sensor_values.transform('std') + 1e-8  # Add small epsilon to prevent division by zero
         )
         df['z_score'] = df['z_score'].replace([np.inf, -np.inf], 0)
         
-        # Fill NaN values and handle infinite values
-        df = df.fillna(method='bfill').fillna(method='ffill')
+        return df
+    
+    def save_dataset(self, df: pd.DataFrame, filepath: str, csv: bool = False) -> str:
+        """
+        Save the generated dataset to file.
         
-        # Replace infinite values with NaN and then fill
-        df = df.replace([np.inf, -np.inf], np.nan)
-        df = df.fillna(method='bfill').fillna(method='ffill')
+        Writes zstd-compressed Parquet (categoricals as dictionary columns), or CSV when
+        `csv` is set or pyarrow is not installed, with the suffix of `filepath` replaced
+        by .parquet or .csv to match.
         
-        # If still NaN, fill with 0
-        df = df.fillna(0)
+        Returns:
+            str: Path of the written file
+        """
+        if csv or not PYARROW_AVAILABLE:
+            filepath = os.path.splitext(filepath)[0] + '.csv'
+            df.to_csv(filepath, index=False)
+        else:
+            filepath = os.path.splitext(filepath)[0] + '.parquet'
+            df.to_parquet(filepath, engine='pyarrow', compression='zstd', index=False)
         
-        return df
-    
-    def save_dataset(self, df: pd.DataFrame, filepath: str) -> None:
-        """Save the generated dataset to file."""
-        df.to_csv(filepath, index=False)
         print(f"💾 Dataset saved to: {filepath}")
         print(f"📊 Dataset shape: {df.shape}")
         
@@ -700,6 +854,8 @@ class IndustrialDataFabricator:
         print(f"  Sensors: {df['sensor_name'].nunique()}")
         print(f"  Time range: {df['timestamp'].min()} to {df['timestamp'].max()}")
         print(f"  Anomaly rate: {df['is_anomaly'].mean()*100:.2f}%")
+        
+        return filepath
 
 
 if __name__ == "__main__":
@@ -714,7 +870,7 @@ if __name__ == "__main__":
     )
     
     # Save dataset
-    fabricator.save_dataset(dataset, 'data/industrial_sensor_data_50k.csv')
+    fabricator.save_dataset(dataset, 'data/industrial_sensor_data_50k.parquet')
     
     print("\n🎉 Data fabrication complete!")
     print("Ready for ML training with CUDA acceleration! 🚀") 
\ No newline at end of file
@@ -4,19 +4,26 @@ Real-Time Electrical Grid Anomaly Detection Deployment
 Deploys the trained reconstruction autoencoder for live monitoring
 """
 
-import pandas as pd
 import numpy as np
 import torch
 import joblib
 from flask import Flask, request, jsonify
 import json
+import os
+import queue
 from datetime import datetime
 import threading
 import time
 from reconstruction_autoencoder import GridAnomalyDetector, ElectricalGridReconstructionAutoencoder
+from realtime_features import SENSOR_VALUE_FEATURES, build_feature_vector
 import warnings
 warnings.filterwarnings('ignore')
 
+# Concurrent /detect requests are scored together: the batch worker waits up to BATCH_DELAY
+# seconds after the first queued row and runs one forward pass over at most BATCH_SIZE rows
+BATCH_SIZE = int(os.environ.get('BATCH_SIZE', 16))
+BATCH_DELAY = float(os.environ.get('BATCH_DELAY', 0.005))
+
 class RealTimeAnomalyDetector:
     """Real-time anomaly detection system for electrical grid."""
     
@@ -30,6 +37,10 @@ class RealTimeAnomalyDetector:
             'current_threat_level': 'LOW'
         }
         
+        # Feature rows waiting for the batch worker, each with the event its request blocks on
+        self.batch_queue = queue.Queue()
+        self.batch_worker = None
+        
     def load_model(self):
         """Load the trained model for deployment."""
         print("🚀 Loading Electrical Grid Anomaly Detection System")
@@ -48,8 +59,24 @@ class RealTimeAnomalyDetector:
             self.detector.autoencoder.load_state_dict(torch.load('models/electrical_grid_autoencoder.pth'))
             self.detector.autoencoder.eval()
             
+            # Slot of each named feature in the model input vector
+            self._feature_index = {name: i for i, name in enumerate(self.detector.feature_columns)}
+            self._sensor_value_slots = np.array([self._feature_index[name] for name in SENSOR_VALUE_FEATURES])
+            self._feature_template = np.zeros(len(self._feature_index), dtype=np.float64)
+            
+            # Label -> code lookups, replacing a LabelEncoder.transform call per field per request
+            self._cat_maps = {
+                feature: {label: code for code, label in enumerate(encoder.classes_)}
+                for feature, encoder in self.detector.label_encoders.items()
+            }
+            
             self.is_loaded = True
             
+            # One background thread runs every forward pass
+            if self.batch_worker is None:
+                self.batch_worker = threading.Thread(target=self.run_batch_worker, daemon=True)
+                self.batch_worker.start()
+            
             print(f"✅ Model loaded successfully!")
             print(f"🔥 Using device: {self.detector.device}")
             print(f"🎯 Reconstruction threshold: {self.detector.reconstruction_threshold:.6f}")
@@ -65,66 +92,21 @@ class RealTimeAnomalyDetector:
             return {'error': 'Model not loaded'}
         
         try:
-            # Convert sensor data to DataFrame format expected by the model
-            df = pd.DataFrame([sensor_data])
-            
-            # Add required columns if missing
-            required_cols = ['timestamp', 'facility_type', 'device_id', 'device_type', 
-                           'sensor_name', 'sensor_value', 'sensor_unit', 'voltage_level',
-                           'nominal_value', 'tolerance_percent', 'criticality', 'is_anomaly',
-                           'anomaly_type', 'hour_of_day', 'day_of_week', 'day_of_year',
-                           'operational_state']
-            
-            for col in required_cols:
-                if col not in df.columns:
-                    if col == 'timestamp':
-                        df[col] = datetime.now()
-                    elif col == 'facility_type':
-                        df[col] = 'electrical_grid'
-                    elif col == 'is_anomaly':
-                        df[col] = 0  # Unknown, to be determined
-                    elif col == 'anomaly_type':
-                        df[col] = None
-                    elif col == 'operational_state':
-                        df[col] = 'unknown'
-                    elif col == 'hour_of_day':
-                        df[col] = datetime.now().hour
-                    elif col == 'day_of_week':
-                        df[col] = datetime.now().weekday()
-                    elif col == 'day_of_year':
-                        df[col] = datetime.now().timetuple().tm_yday
-                    else:
-                        df[col] = 0  # Default value
-            
-            # Add time-series features (simplified for real-time)
-            for window in [5, 10, 30]:
-                df[f'rolling_mean_{window}'] = df['sensor_value']  # Use current value as approximation
-                df[f'rolling_std_{window}'] = 0  # No historical data for std
-            
-            for lag in [1, 5, 10]:
-                df[f'lag_{lag}'] = df['sensor_value']  # Use current value as approximation
-            
-            df['rate_of_change'] = 0  # No previous value to compare
-            df['deviation_from_nominal'] = abs(df['sensor_value'] - df['nominal_value']) / df['nominal_value']
-            df['z_score'] = 0  # No rolling stats for z-score
-            
-            # Prepare features
-            X = self.detector.prepare_features(df)
-            X_scaled = self.detector.scaler.transform(X)
-            
-            # Get prediction
-            predictions, anomaly_scores, reconstruction_errors = self.detector.detect_anomalies(X_scaled)
+            # Build the input row directly, without a DataFrame round trip, and get its
+            # prediction from the next batched forward pass
+            features = self.build_feature_vector(sensor_data)
+            prediction, anomaly_score, reconstruction_error = self.score_in_batch(features)
             
             # Update statistics
             self.detection_stats['total_samples'] += 1
-            is_anomaly = bool(predictions[0])
+            is_anomaly = bool(prediction)
             
             if is_anomaly:
                 self.detection_stats['anomalies_detected'] += 1
                 self.detection_stats['last_detection_time'] = datetime.now().isoformat()
                 
                 # Determine threat level based on reconstruction error
-                error_ratio = reconstruction_errors[0] / self.detector.reconstruction_threshold
+                error_ratio = reconstruction_error / self.detector.reconstruction_threshold
                 if error_ratio > 10:
                     threat_level = 'CRITICAL'
                 elif error_ratio > 5:
@@ -139,10 +121,10 @@ class RealTimeAnomalyDetector:
             result = {
                 'timestamp': datetime.now().isoformat(),
                 'is_anomaly': is_anomaly,
-                'anomaly_score': float(anomaly_scores[0]),
-                'reconstruction_error': float(reconstruction_errors[0]),
+                'anomaly_score': float(anomaly_score),
+                'reconstruction_error': float(reconstruction_error),
                 'threshold': float(self.detector.reconstruction_threshold),
-                'confidence': float(min(anomaly_scores[0], 10.0) / 10.0),  # Cap at 10x threshold
+                'confidence': float(min(anomaly_score, 10.0) / 10.0),  # Cap at 10x threshold
                 'threat_level': self.detection_stats['current_threat_level'] if is_anomaly else 'NORMAL',
                 'sensor_data': sensor_data
             }
@@ -152,6 +134,50 @@ class RealTimeAnomalyDetector:
         except Exception as e:
             return {'error': f'Detection failed: {str(e)}'}
     
+    def build_feature_vector(self, sensor_data):
+        """Build the model input row for one reading without going through pandas."""
+        return build_feature_vector(sensor_data, self._feature_template, self._feature_index,
+                                    self._sensor_value_slots, self._cat_maps)
+    
+    def score_in_batch(self, features):
+        """Queue one feature row for the batch worker and wait for its scores."""
+        done = threading.Event()
+        outcome = {}
+        self.batch_queue.put((features, done, outcome))
+        done.wait()
+        
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome['scores']
+    
+    def run_batch_worker(self):
+        """Coalesce queued rows into batches, scaling and scoring each batch in one call."""
+        while True:
+            batch = [self.batch_queue.get()]
+            deadline = time.monotonic() + BATCH_DELAY
+            while len(batch) < BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.batch_queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            try:
+                X_scaled = self.detector.scaler.transform(np.vstack([features for features, _, _ in batch]))
+                with torch.inference_mode():
+                    predictions, anomaly_scores, reconstruction_errors = self.detector.detect_anomalies(X_scaled)
+                
+                for i, (_, _, outcome) in enumerate(batch):
+                    outcome['scores'] = (predictions[i], anomaly_scores[i], reconstruction_errors[i])
+            except Exception as e:
+                for _, _, outcome in batch:
+                    outcome['error'] = e
+            
+            for _, done, _ in batch:
+                done.set()
+    
     def get_stats(self):
         """Get detection statistics."""
         total = self.detection_stats['total_samples']
@@ -9,7 +9,7 @@ import os
 import pandas as pd
 import numpy as np
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 import uvicorn
 import asyncio
 import threading
@@ -36,6 +36,9 @@ class SensorData(BaseModel):
     tolerance_percent: float = 5.0
     criticality: str = "critical"
 
+class SensorBatch(BaseModel):
+    samples: List[SensorData]
+
 class ProductionServer:
     def __init__(self):
         self.app = FastAPI(
@@ -144,6 +147,17 @@ class ProductionServer:
             except Exception as e:
                 raise HTTPException(status_code=500, detail=str(e))
         
+        @self.app.post("/api/detect/batch")
+        async def detect_anomaly_batch(batch: SensorBatch):
+            """Score several samples in one request, returning results in order."""
+            if not self.model_loaded:
+                raise HTTPException(status_code=503, detail="Model not available")
+            
+            try:
+                return [await self.process_detection(sample.dict()) for sample in batch.samples]
+            except Exception as e:
+                raise HTTPException(status_code=500, detail=str(e))
+        
         @self.app.post("/api/simulate-attack")
         async def simulate_attack(attack_data: dict):
             """Simulate attack for demo purposes."""
@@ -210,6 +224,7 @@ class ProductionServer:
                         "health": "/api/health",
                         "stats": "/api/stats",
                         "detect": "/api/detect",
+                        "detect_batch": "/api/detect/batch",
                         "simulate": "/api/simulate-attack"
                     },
                     "note": "Frontend not built. Run 'npm run build' in frontend directory."
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Real-Time Feature Rows for the Reconstruction Autoencoder
+Builds the training-time feature layout for a single live sensor reading
+"""
+
+import numpy as np
+from datetime import datetime
+
+# Categorical inputs label-encoded by the detector, in training order
+CATEGORICAL_FEATURES = ['device_id', 'device_type', 'sensor_name', 'voltage_level', 'criticality']
+
+# Without history, rolling means and lags repeat the current reading in real time
+SENSOR_VALUE_FEATURES = ['sensor_value', 'rolling_mean_5', 'rolling_mean_10', 'rolling_mean_30', 'lag_1', 'lag_5', 'lag_10']
+
+def build_feature_vector(sensor_data, template, feature_index, sensor_value_slots, cat_maps):
+    """Build the model input row for one reading without going through pandas."""
+    now = datetime.now()
+    
+    # Fields the reading leaves out default as they always have: 0, or the current time
+    sensor_value = np.float64(sensor_data.get('sensor_value', 0))
+    nominal_value = np.float64(sensor_data.get('nominal_value', 0))
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        deviation_from_nominal = abs(sensor_value - nominal_value) / nominal_value
+    
+    # Rolling std, rate of change and z-score have no history to draw on and keep the template's 0
+    index = feature_index
+    x = template.copy()
+    x[sensor_value_slots] = sensor_value
+    x[index['nominal_value']] = nominal_value
+    x[index['tolerance_percent']] = sensor_data.get('tolerance_percent', 0)
+    x[index['hour_of_day']] = sensor_data.get('hour_of_day', now.hour)
+    x[index['day_of_week']] = sensor_data.get('day_of_week', now.weekday())
+    x[index['day_of_year']] = sensor_data.get('day_of_year', now.timetuple().tm_yday)
+    x[index['deviation_from_nominal']] = deviation_from_nominal
+    
+    for feature in CATEGORICAL_FEATURES:
+        value = sensor_data.get(feature, 0)
+        try:
+            x[index[f'{feature}_encoded']] = cat_maps[feature][value]
+        except KeyError:
+            # Unseen labels are rejected, as LabelEncoder.transform does
+            raise ValueError(f"y contains previously unseen labels: {value!r}") from None
+    
+    # Same NaN/inf handling as GridAnomalyDetector.prepare_features
+    return np.nan_to_num(x, nan=0.0)
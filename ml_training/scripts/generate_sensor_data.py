@@ -24,12 +24,15 @@ def main():
     parser.add_argument('--anomaly-rate', type=float, default=0.05,
                        help='Anomaly rate (default: 0.05 = 5%)')
     
-    parser.add_argument('--output', type=str, default='data/industrial_sensor_data.csv',
-                       help='Output file path')
+    parser.add_argument('--output', type=str, default='data/industrial_sensor_data.parquet',
+                       help='Output file path (default: data/industrial_sensor_data.parquet)')
     
     parser.add_argument('--seed', type=int, default=42,
                        help='Random seed for reproducibility')
     
+    parser.add_argument('--csv', action='store_true',
+                       help='Write CSV instead of Parquet (the output suffix becomes .csv)')
+    
     args = parser.parse_args()
     
     # Parse facilities
@@ -69,10 +72,10 @@ def main():
     )
     
     # Save dataset
-    fabricator.save_dataset(dataset, args.output)
+    output_path = fabricator.save_dataset(dataset, args.output, csv=args.csv)
     
     print(f"\n🎉 Data generation complete!")
-    print(f"📁 Dataset saved to: {args.output}")
+    print(f"📁 Dataset saved to: {output_path}")
     print(f"📊 Ready for ML training!")
 
 
@@ -16,8 +16,8 @@ import torch
 def main():
     parser = argparse.ArgumentParser(description='Train CUDA-accelerated anomaly detection models')
     
-    parser.add_argument('--data', type=str, default='data/industrial_sensor_data.csv',
-                       help='Path to training data CSV file')
+    parser.add_argument('--data', type=str, default='data/industrial_sensor_data.parquet',
+                       help='Path to training data Parquet or CSV file (default: data/industrial_sensor_data.parquet)')
     
     parser.add_argument('--use-cuda', action='store_true',
                        help='Use CUDA acceleration if available')
@@ -57,7 +57,11 @@ def main():
     
     args = parser.parse_args()
     
-    # Check if data file exists
+    # Check if data file exists, falling back to the CSV written by generate_sensor_data.py --csv
+    csv_data = os.path.splitext(args.data)[0] + '.csv'
+    if not os.path.exists(args.data) and os.path.exists(csv_data):
+        args.data = csv_data
+    
     if not os.path.exists(args.data):
         print(f"❌ Data file not found: {args.data}")
         print("💡 Run generate_sensor_data.py first to create training data")
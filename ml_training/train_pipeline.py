@@ -30,7 +30,7 @@ def main():
         'anomaly_rate': 0.05,
         'use_cuda': False,  # Set to False since CUDA not available
         'random_seed': 42,
-        'data_file': 'data/industrial_sensor_data_25k.csv',
+        'data_file': 'data/industrial_sensor_data_25k.parquet',
         'model_dir': 'models/'
     }
     
@@ -59,7 +59,7 @@ def main():
         anomaly_rate=config['anomaly_rate']
     )
     
-    fabricator.save_dataset(dataset, config['data_file'])
+    config['data_file'] = fabricator.save_dataset(dataset, config['data_file'])
     
     data_time = time.time() - data_start_time
     print(f"✅ Data generation completed in {data_time:.2f} seconds")
@@ -10,6 +10,7 @@ from sklearn.metrics import classification_report, confusion_matrix, roc_auc_sco
 import joblib
 import pickle
 from typing import Dict, List, Tuple, Optional
+import os
 import time
 from datetime import datetime
 import matplotlib.pyplot as plt
@@ -132,9 +133,17 @@ class EnsembleAnomalyTrainer:
     
     def load_data(self, filepath: str) -> None:
         """Load and preprocess the fabricated sensor data."""
+        # Fall back to the CSV the fabricator writes when pyarrow is unavailable
+        csv_filepath = os.path.splitext(filepath)[0] + '.csv'
+        if not os.path.exists(filepath) and os.path.exists(csv_filepath):
+            filepath = csv_filepath
+        
         print(f"📂 Loading data from: {filepath}")
         
-        self.df = pd.read_csv(filepath)
+        if filepath.endswith('.parquet'):
+            self.df = pd.read_parquet(filepath)
+        else:
+            self.df = pd.read_csv(filepath)
         self.df['timestamp'] = pd.to_datetime(self.df['timestamp'])
         
         print(f"📊 Loaded {len(self.df):,} samples")
@@ -636,7 +645,7 @@ if __name__ == "__main__":
     trainer = EnsembleAnomalyTrainer(use_cuda=True)
     
     # Load fabricated data
-    trainer.load_data('data/industrial_sensor_data_50k.csv')
+    trainer.load_data('data/industrial_sensor_data_50k.parquet')
     
     # Train all models
     trainer.train_all_models()